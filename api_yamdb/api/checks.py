@@ -0,0 +1,24 @@
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def shared_cache_check(app_configs, **kwargs):
+    """
+    Версии моделей для ETag и кеша списков живут в кеше default.
+    В памяти процесса запись, обработанная одним процессом сервера,
+    не сдвигает версии в остальных, и они отдают устаревшие ответы.
+    """
+
+    if not isinstance(caches['default'], LocMemCache):
+        return []
+    return [checks.Warning(
+        'Кеш default хранится в памяти процесса: при нескольких '
+        'процессах сервера ETag и кеш списков отдают устаревшие данные.',
+        hint=(
+            'Укажите общий кеш в переменных окружения CACHE_BACKEND '
+            'и CACHE_LOCATION, например Memcached.'
+        ),
+        id='api.W001',
+    )]
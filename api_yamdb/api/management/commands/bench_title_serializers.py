@@ -0,0 +1,94 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.v1.serializers import TitleFastReadSerializer, TitleReadSerializer
+from reviews.models import Category, Genre, GenreTitle, Title
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = '''Сравнение времени процессора на сериализацию произведений:
+    TitleReadSerializer и TitleFastReadSerializer.
+    Тестовые данные создаются в транзакции и откатываются.'''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def create_titles(self, count):
+        category = Category.objects.create(name='Бенчмарк', slug='bench')
+        genres = [
+            Genre.objects.create(name=f'Жанр {i}', slug=f'bench-{i}')
+            for i in range(3)
+        ]
+        titles = Title.objects.bulk_create(
+            Title(
+                name=f'Произведение {i}',
+                year=2000,
+                description='Описание ' * 10,
+                category=category
+            )
+            for i in range(count)
+        )
+        ids = Title.objects.filter(category=category).values_list(
+            'id', flat=True
+        )
+        GenreTitle.objects.bulk_create(
+            GenreTitle(title_id=title_id, genre=genre)
+            for title_id in ids for genre in genres[:2]
+        )
+        return category, len(titles)
+
+    def measure(self, render, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.process_time()
+            data = render()
+            spent = time.process_time() - start
+            best = spent if best is None else min(best, spent)
+        return best, data
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                category, count = self.create_titles(options['titles'])
+                queryset = Title.objects.filter(category=category).order_by(
+                    'name', 'id'
+                )
+                drf_time, drf_data = self.measure(
+                    lambda: TitleReadSerializer(
+                        queryset.prefetch_related('genre').select_related(
+                            'category'
+                        ),
+                        many=True
+                    ).data,
+                    options['repeat']
+                )
+                fast_time, fast_data = self.measure(
+                    lambda: TitleFastReadSerializer(
+                        TitleFastReadSerializer.get_queryset(queryset),
+                        many=True
+                    ).data,
+                    options['repeat']
+                )
+                raise Rollback
+        except Rollback:
+            pass
+
+        if [dict(item) for item in drf_data] != fast_data:
+            self.stderr.write('Ответы сериализаторов различаются!')
+        per_thousand = 1000 / count * 1000
+        self.stdout.write(
+            f'Произведений: {count}, лучшее из {options["repeat"]}\n'
+            f'TitleReadSerializer:     '
+            f'{drf_time * per_thousand:.1f} мс на 1000\n'
+            f'TitleFastReadSerializer: '
+            f'{fast_time * per_thousand:.1f} мс на 1000\n'
+            f'Экономия: {(drf_time - fast_time) * per_thousand:.1f} мс '
+            f'на 1000 ({drf_time / fast_time:.1f}x)'
+        )
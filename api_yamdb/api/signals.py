@@ -0,0 +1,31 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from api.v1.cache import bump_version_on_commit
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.signals import data_imported
+from users.models import User
+
+# Модели, чьи ответы API кешируются или помечаются ETag по версии
+VERSIONED_MODELS = (Category, Comment, Genre, Review, Title, User)
+
+
+def model_changed(sender, **kwargs):
+    bump_version_on_commit(sender)
+
+
+def title_genre_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_version_on_commit(Title)
+
+
+def data_reloaded(sender, **kwargs):
+    # Импорт обходит сигналы моделей: сбрасываем все версии
+    for model in VERSIONED_MODELS:
+        bump_version_on_commit(model)
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(model_changed, sender=model)
+    post_delete.connect(model_changed, sender=model)
+m2m_changed.connect(title_genre_changed, sender=Title.genre.through)
+data_imported.connect(data_reloaded)
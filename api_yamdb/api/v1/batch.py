@@ -0,0 +1,160 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import Resolver404, resolve
+from rest_framework import serializers, status
+
+logger = logging.getLogger('django.request')
+
+BATCH_PATH_PREFIX = '/api/v1/'
+BATCH_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+READ_METHODS = ('GET',)
+# Заголовки запроса-пакета, которые не переносятся во вложенные запросы
+DROPPED_META = (
+    'CONTENT_LENGTH',
+    'CONTENT_TYPE',
+    'HTTP_IF_MATCH',
+    'HTTP_IF_NONE_MATCH',
+    'QUERY_STRING',
+)
+
+
+class BatchItemSerializer(serializers.Serializer):
+    """
+    Один вложенный запрос пакета.
+    """
+
+    method = serializers.ChoiceField(choices=BATCH_METHODS)
+    path = serializers.CharField(max_length=2048)
+    body = serializers.JSONField(required=False)
+
+    def validate_path(self, value):
+        if not value.startswith(BATCH_PATH_PREFIX):
+            raise serializers.ValidationError(
+                f'Путь должен начинаться с {BATCH_PATH_PREFIX}'
+            )
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    """
+    Пакет не длиннее BATCH_MAX_REQUESTS запросов.
+    """
+
+    requests = BatchItemSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        if len(value) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(
+                f'Не больше {settings.BATCH_MAX_REQUESTS} запросов в пакете.'
+            )
+        return value
+
+
+def build_request(request, item):
+    """
+    WSGI-запрос для элемента пакета с заголовками исходного запроса,
+    в том числе Authorization: права проверяются как у вызывающего.
+    """
+
+    path, _, query = item['path'].partition('?')
+    body = b''
+    if 'body' in item:
+        body = json.dumps(item['body']).encode('utf-8')
+    environ = {
+        key: value for key, value in request.META.items()
+        if key not in DROPPED_META
+    }
+    environ.update({
+        'REQUEST_METHOD': item['method'],
+        'PATH_INFO': path.encode('utf-8').decode('iso-8859-1'),
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'HTTP_ACCEPT': 'application/json',
+        'wsgi.input': BytesIO(body),
+    })
+    return WSGIRequest(environ)
+
+
+def dispatch(request, item):
+    """
+    Выполняет элемент пакета через URL-резолвер без HTTP
+    и возвращает его статус и тело ответа.
+    """
+
+    subrequest = build_request(request, item)
+    try:
+        match = resolve(subrequest.path_info)
+    except Resolver404:
+        return {
+            'status': status.HTTP_404_NOT_FOUND,
+            'body': {'detail': 'Страница не найдена.'}
+        }
+    if match.url_name == 'batch':
+        return {
+            'status': status.HTTP_400_BAD_REQUEST,
+            'body': {'detail': 'Вложенные пакеты не поддерживаются.'}
+        }
+    try:
+        response = match.func(subrequest, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+    except Exception:
+        logger.exception('Ошибка в запросе пакета: %s', subrequest.path)
+        return {
+            'status': status.HTTP_500_INTERNAL_SERVER_ERROR,
+            'body': None
+        }
+    if response.streaming:
+        response.close()
+        return {
+            'status': status.HTTP_400_BAD_REQUEST,
+            'body': {'detail': 'Потоковые ответы в пакете не поддерживаются.'}
+        }
+    return {
+        'status': response.status_code,
+        'body': json.loads(response.content) if response.content else None
+    }
+
+
+def dispatch_read(request, item):
+    """
+    Чтение в потоке пула: соединение с БД потока закрывается сразу.
+    """
+
+    try:
+        return dispatch(request, item)
+    finally:
+        connections.close_all()
+
+
+def run_batch(request, items):
+    """
+    Выполняет пакет по порядку. Подряд идущие чтения независимы
+    и выполняются параллельно в пуле из BATCH_MAX_WORKERS потоков,
+    а каждая запись ждёт предыдущие чтения и выполняется в текущем
+    потоке, чтобы следующие запросы видели её результат.
+    """
+
+    results = [None] * len(items)
+    with ThreadPoolExecutor(settings.BATCH_MAX_WORKERS) as executor:
+        reads = []
+        for index, item in enumerate(items):
+            if item['method'] in READ_METHODS:
+                reads.append(
+                    (index, executor.submit(dispatch_read, request, item))
+                )
+                continue
+            for read_index, future in reads:
+                results[read_index] = future.result()
+            reads = []
+            results[index] = dispatch(request, item)
+        for read_index, future in reads:
+            results[read_index] = future.result()
+    return results
@@ -0,0 +1,131 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def version_key(model):
+    return f'version:{model._meta.label_lower}'
+
+
+def get_version(model):
+    """
+    Текущая версия данных модели.
+    Начальное значение берётся из времени, чтобы после вытеснения ключа
+    из кеша версия не совпала с уже использованной ранее.
+    """
+
+    return cache.get_or_set(
+        version_key(model), time.time_ns(), timeout=None
+    )
+
+
+def bump_version(model):
+    """
+    Сдвигает версию модели: все закешированные ответы,
+    построенные на старой версии, перестают находиться.
+    """
+
+    try:
+        cache.incr(version_key(model))
+    except ValueError:
+        get_version(model)
+
+
+def bump_version_on_commit(model):
+    """
+    Сдвигает версию модели после фиксации текущей транзакции,
+    вне транзакции - сразу. Если сдвинуть раньше, чтение между
+    сдвигом и фиксацией сохранит старые данные под новой версией.
+    """
+
+    transaction.on_commit(lambda: bump_version(model))
+
+
+def query_cache_key(prefix, model, request):
+    """
+    Ключ кеша из версии модели и нормализованной строки запроса.
+    """
+
+    query = sorted(request.query_params.lists())
+    digest = hashlib.md5(repr(query).encode('utf-8')).hexdigest()
+    return f'{prefix}:{model._meta.label_lower}:{get_version(model)}:{digest}'
+
+
+class CachedListMixin:
+    """
+    Кеширует ответ list по строке запроса.
+    Кеш сбрасывается сменой версии модели при записи,
+    поэтому повторное чтение не обращается к базе данных.
+    """
+
+    def list(self, request, *args, **kwargs):
+        key = query_cache_key('list', self.queryset.model, request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, settings.LIST_CACHE_TIMEOUT)
+        return response
+
+
+class ETagMixin:
+    """
+    Строгий ETag для list и retrieve без рендеринга тела.
+    ETag строится из версий моделей etag_models, пути с параметрами
+    и выбранного формата ответа. При совпадении с If-None-Match
+    возвращается 304 до обращения к queryset и сериализатору.
+    Тот же ETag служит ключом серверного кеша в cached_data.
+    """
+
+    etag_models = ()
+
+    def get_etag(self, request):
+        source = repr((
+            [get_version(model) for model in self.etag_models],
+            request.get_full_path(),
+            request.accepted_media_type,
+        ))
+        return quote_etag(hashlib.md5(source.encode('utf-8')).hexdigest())
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag = self.etag = self.get_etag(request)
+        if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        # '*' не обрабатывается: без поиска объекта неизвестно,
+        # существует ли ресурс, и 304 вернулся бы вместо 404
+        if etag in if_none_match:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED
+        ):
+            response['ETag'] = etag
+        return response
+
+    def cached_data(self, prefix, build):
+        """
+        Данные ответа из кеша по ETag текущего запроса.
+        """
+
+        key = f'{prefix}:{self.etag}'
+        data = cache.get(key)
+        if data is None:
+            data = build()
+            cache.set(key, data, settings.LIST_CACHE_TIMEOUT)
+        return data
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
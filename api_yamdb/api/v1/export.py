@@ -0,0 +1,155 @@
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import StreamingHttpResponse
+from rest_framework import serializers
+
+from api.v1.pagination import decode_keyset, encode_keyset, keyset_filter
+from api.v1.serializers import TitleFastReadSerializer
+from reviews.models import Review
+
+JSON_CONTENT_TYPE = 'application/json'
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+# Порядок выгрузки отзывов и комментариев, он же ключ курсора
+EXPORT_ORDERING = ('pub_date', 'id')
+
+# (ключ в строке выгрузки, поле в values())
+REVIEW_EXPORT_PLAN = (
+    ('id', 'id'),
+    ('title', 'title_id'),
+    ('author', 'author__username'),
+    ('text', 'text'),
+    ('score', 'score'),
+    ('pub_date', 'pub_date'),
+    ('is_hidden', 'is_hidden'),
+)
+COMMENT_EXPORT_PLAN = (
+    ('id', 'id'),
+    ('title', 'review__title_id'),
+    ('review', 'review_id'),
+    ('author', 'author__username'),
+    ('text', 'text'),
+    ('pub_date', 'pub_date'),
+    ('is_hidden', 'is_hidden'),
+)
+
+
+class ExportParamsSerializer(serializers.Serializer):
+    """
+    Сериализатор: параметры выгрузки отзывов и комментариев.
+    """
+
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+    after = serializers.CharField(required=False)
+
+    def validate_after(self, value):
+        """
+        Курсор последней полученной строки превращаем в значения ключа.
+        """
+
+        try:
+            values, _ = decode_keyset(value, len(EXPORT_ORDERING))
+            Review._meta.get_field('pub_date').to_python(values[0])
+            Review._meta.get_field('id').to_python(values[1])
+        except (ValueError, ValidationError):
+            raise serializers.ValidationError('Некорректный курсор.')
+        return values
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def dumps(item):
+    return json.dumps(item, ensure_ascii=False, default=str)
+
+
+def iter_json_array(items):
+    """
+    JSON-массив по одному элементу за раз, без сборки в памяти.
+    """
+
+    yield '['
+    separator = ''
+    for item in items:
+        yield separator + dumps(item)
+        separator = ','
+    yield ']'
+
+
+def iter_ndjson(items):
+    for item in items:
+        yield dumps(item) + '\n'
+
+
+def streaming_response(items, output, filename):
+    """
+    Потоковый ответ в формате output: json (по умолчанию) или ndjson.
+    """
+
+    if output == 'ndjson':
+        response = StreamingHttpResponse(
+            iter_ndjson(items), content_type=NDJSON_CONTENT_TYPE
+        )
+        filename = f'{filename}.ndjson'
+    else:
+        response = StreamingHttpResponse(
+            iter_json_array(items), content_type=JSON_CONTENT_TYPE
+        )
+        filename = f'{filename}.json'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def iter_titles(queryset, chunk_size=None):
+    """
+    Произведения с жанрами, категорией и рейтингом.
+    Строки читаются через iterator() порциями по chunk_size,
+    жанры подгружаются одним запросом на порцию.
+    """
+
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    rows = TitleFastReadSerializer.get_queryset(
+        queryset.order_by('id')
+    ).iterator(chunk_size=chunk_size)
+    for chunk in batched(rows, chunk_size):
+        yield from TitleFastReadSerializer(chunk, many=True).data
+
+
+def iter_by_pub_date(queryset, plan, since=None, until=None, after=None,
+                     chunk_size=None):
+    """
+    Строки queryset по плану plan в порядке (pub_date, id).
+    since включительно, until не включительно. after - значения ключа
+    из курсора последней полученной строки: выгрузка продолжится
+    сразу после неё. Связанные поля (автор, произведение) приходят
+    из JOIN в том же запросе.
+    """
+
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    if since is not None:
+        queryset = queryset.filter(pub_date__gte=since)
+    if until is not None:
+        queryset = queryset.filter(pub_date__lt=until)
+    if after is not None:
+        queryset = queryset.filter(
+            keyset_filter(queryset.model, EXPORT_ORDERING, after)
+        )
+    rows = queryset.order_by(*EXPORT_ORDERING).values(
+        *(source for _, source in plan)
+    ).iterator(chunk_size=chunk_size)
+    date_field = serializers.DateTimeField()
+    for row in rows:
+        item = {key: row[source] for key, source in plan}
+        item['pub_date'] = date_field.to_representation(row['pub_date'])
+        item['cursor'] = encode_keyset((row['pub_date'], row['id']))
+        yield item
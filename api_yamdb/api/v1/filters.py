@@ -1,6 +1,42 @@
+from django import forms
+from django.conf import settings
+from django.db.models import Case, Count, IntegerField, When
 from django_filters import rest_framework as filters
+from django_filters.fields import BaseCSVField
+from django_filters.utils import translate_validation
+from rest_framework.filters import BaseFilterBackend
 
-from reviews.models import Title
+from reviews.fts import fts_search
+from reviews.models import Category, Genre, Title
+
+
+class LimitedCSVField(BaseCSVField):
+    """
+    Значения через запятую, но не больше max_count.
+    """
+
+    def __init__(self, *args, max_count=None, **kwargs):
+        self.max_count = max_count
+        super().__init__(*args, **kwargs)
+
+    def clean(self, value):
+        if (
+            value is not None and self.max_count is not None
+            and len(value) > self.max_count
+        ):
+            raise forms.ValidationError(
+                f'Не больше {self.max_count} значений.'
+            )
+        return super().clean(value)
+
+
+class IdInFilter(filters.BaseInFilter):
+    """
+    Список id через запятую (?ids=1,2,3) ограниченной длины.
+    """
+
+    base_field_class = LimitedCSVField
+    field_class = forms.IntegerField
 
 
 class TitleFilter(filters.FilterSet):
@@ -11,7 +47,86 @@ class TitleFilter(filters.FilterSet):
     genre = filters.CharFilter(field_name='genre__slug')
     category = filters.CharFilter(field_name='category__slug')
     name = filters.CharFilter(field_name='name', lookup_expr='icontains')
+    search = filters.CharFilter(method='filter_search')
+    ids = IdInFilter(method='filter_ids', max_count=settings.TITLE_IDS_MAX)
 
     class Meta:
         model = Title
-        fields = ('genre', 'category', 'name', 'year')
+        fields = ('genre', 'category', 'name', 'year', 'search', 'ids')
+
+    def filter_ids(self, queryset, name, value):
+        """
+        Произведения с перечисленными id в порядке из запроса.
+        """
+
+        ids = list(dict.fromkeys(value))
+        return queryset.filter(pk__in=ids).order_by(Case(
+            *(When(pk=pk, then=position) for position, pk in enumerate(ids)),
+            output_field=IntegerField()
+        ))
+
+    def filter_search(self, queryset, name, value):
+        """
+        Полнотекстовый поиск по названию и описанию,
+        результаты упорядочены по релевантности.
+        """
+
+        return fts_search(
+            queryset, 'reviews_title_fts', value, ('name', 'description')
+        )
+
+
+def get_title_facets(params, queryset):
+    """
+    Число произведений по жанрам, категориям и годам.
+    Каждый срез считается одним запросом с группировкой по всем
+    фильтрам TitleFilter, кроме своего собственного, чтобы в боковой
+    панели были видны и соседние значения выбранного фильтра.
+    """
+
+    filterset = TitleFilter(params, queryset=queryset)
+    if not filterset.is_valid():
+        raise translate_validation(filterset.errors)
+
+    def titles_without(facet):
+        data = params.copy()
+        data.pop(facet, None)
+        return TitleFilter(
+            data, queryset=queryset
+        ).qs.order_by().values('pk')
+
+    return {
+        'genre': list(Genre.objects.filter(
+            title__in=titles_without('genre')
+        ).annotate(count=Count('title')).values(
+            'name', 'slug', 'count'
+        ).order_by('slug')),
+        'category': list(Category.objects.filter(
+            title__in=titles_without('category')
+        ).annotate(count=Count('title')).values(
+            'name', 'slug', 'count'
+        ).order_by('slug')),
+        'year': list(Title.objects.filter(
+            pk__in=titles_without('year')
+        ).values('year').annotate(count=Count('pk')).order_by('year')),
+    }
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Полнотекстовый поиск по параметру search.
+    Таблица FTS5 и запасные поля для других СУБД берутся
+    из атрибутов представления fts_table, fts_fallback_fields
+    и fts_snippet_column.
+    """
+
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        return fts_search(
+            queryset,
+            view.fts_table,
+            request.query_params.get(self.search_param, ''),
+            view.fts_fallback_fields,
+            getattr(view, 'fts_snippet_column', None)
+        )
@@ -0,0 +1,124 @@
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+
+from api.v1.cache import bump_version_on_commit
+from reviews.models import Comment, Review, Title
+from reviews.signals import deferred_rating
+
+MODERATION_ACTIONS = ('delete', 'hide', 'show')
+
+
+class ModerationSerializer(serializers.Serializer):
+    """
+    Сериализатор: массовая модерация по списку id или фильтру.
+    """
+
+    action = serializers.ChoiceField(choices=MODERATION_ACTIONS)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=settings.MODERATION_MAX_IDS
+    )
+    author = serializers.CharField(max_length=150, required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        if not {'ids', 'author', 'since', 'until'} & set(data):
+            raise serializers.ValidationError(
+                'Укажите ids или хотя бы один фильтр: author, since, until.'
+            )
+        return data
+
+    def filter_queryset(self, queryset):
+        data = self.validated_data
+        if 'ids' in data:
+            queryset = queryset.filter(pk__in=data['ids'])
+        if 'author' in data:
+            queryset = queryset.filter(author__username=data['author'])
+        if 'since' in data:
+            queryset = queryset.filter(pub_date__gte=data['since'])
+        if 'until' in data:
+            queryset = queryset.filter(pub_date__lt=data['until'])
+        return queryset
+
+
+def iter_batches(queryset, batch_size):
+    """
+    id подходящих записей пачками по возрастанию.
+    Следующая пачка выбирается после последнего id, поэтому
+    удаление уже обработанных строк не сдвигает выборку.
+    """
+
+    last = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last).order_by('pk').values_list(
+            'pk', flat=True
+        )[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last = batch[-1]
+
+
+def apply_action(model, ids, action):
+    if action == 'delete':
+        model.objects.filter(pk__in=ids).delete()
+    else:
+        model.objects.filter(pk__in=ids).update(is_hidden=action == 'hide')
+        # update() не отправляет post_save
+        bump_version_on_commit(model)
+
+
+def moderate_reviews(queryset, action, batch_size=None):
+    """
+    Удаляет, скрывает или возвращает отзывы пачками, каждая
+    в своей транзакции. Сигналы отзывов рейтинг не трогают: он
+    пересчитывается один раз для каждого затронутого произведения
+    после всех пачек, в том числе если очередная пачка упала.
+    """
+
+    batch_size = batch_size or settings.MODERATION_BATCH_SIZE
+    count = 0
+    title_ids = set()
+    try:
+        for ids in iter_batches(queryset, batch_size):
+            with transaction.atomic(), deferred_rating():
+                title_ids.update(Review.objects.filter(
+                    pk__in=ids
+                ).values_list('title_id', flat=True))
+                apply_action(Review, ids, action)
+            count += len(ids)
+    finally:
+        refresh_titles(sorted(title_ids), batch_size)
+    return count
+
+
+def refresh_titles(title_ids, batch_size):
+    """
+    Пересчитывает рейтинг произведений пачками по batch_size id.
+    """
+
+    for start in range(0, len(title_ids), batch_size):
+        Title.objects.filter(
+            pk__in=title_ids[start:start + batch_size]
+        ).refresh_rating()
+    if title_ids:
+        bump_version_on_commit(Title)
+
+
+def moderate_comments(queryset, action, batch_size=None):
+    """
+    Удаляет, скрывает или возвращает комментарии пачками,
+    каждая в своей транзакции.
+    """
+
+    batch_size = batch_size or settings.MODERATION_BATCH_SIZE
+    count = 0
+    for ids in iter_batches(queryset, batch_size):
+        with transaction.atomic():
+            apply_action(Comment, ids, action)
+        count += len(ids)
+    return count
@@ -0,0 +1,172 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_keyset(values, reverse=False):
+    """
+    Непрозрачный курсор из значений ключа сортировки.
+    """
+
+    payload = {'v': list(values)}
+    if reverse:
+        payload['r'] = 1
+    return base64.urlsafe_b64encode(
+        json.dumps(payload, default=str).encode('utf-8')
+    ).decode('ascii')
+
+
+def decode_keyset(encoded, size):
+    """
+    Значения ключа и направление из курсора.
+    Для испорченного курсора выбрасывает ValueError.
+    """
+
+    try:
+        payload = json.loads(
+            base64.urlsafe_b64decode(encoded.encode('ascii'))
+        )
+        values, reverse = payload['v'], bool(payload.get('r'))
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise ValueError('Некорректный курсор.')
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Некорректный курсор.')
+    return values, reverse
+
+
+def keyset_filter(model, ordering, values):
+    """
+    Условие «строго после» для составного ключа:
+    (a > x) OR (a = x AND b > y) OR ...
+    """
+
+    condition = Q()
+    equal = {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        value = model._meta.get_field(name).to_python(value)
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return condition
+
+
+class KeysetPagination(BasePagination):
+    """
+    Постраничный вывод по ключу сортировки.
+    Следующая страница выбирается условием WHERE по значениям
+    последней строки, а не через OFFSET, поэтому любая страница
+    стоит одинаково, а COUNT(*) не выполняется вовсе.
+    Поля сортировки берутся из атрибута cursor_ordering представления,
+    последним полем должен идти уникальный id.
+    """
+
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.ordering = view.cursor_ordering
+        values, reverse = self.decode_cursor(request)
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(self.invert(field) for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            try:
+                keyset = keyset_filter(queryset.model, ordering, values)
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(keyset)
+        rows = list(queryset[:self.limit + 1])
+        has_more = len(rows) > self.limit
+        self.page = rows[:self.limit]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        })
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+        if limit <= 0:
+            return api_settings.PAGE_SIZE
+        return min(limit, settings.CURSOR_MAX_PAGE_SIZE)
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            return decode_keyset(encoded, len(self.ordering))
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse):
+        fields = [field.lstrip('-') for field in self.ordering]
+        if isinstance(obj, dict):
+            values = [obj[field] for field in fields]
+        else:
+            values = [getattr(obj, field) for field in fields]
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, encode_keyset(values, reverse)
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+
+class OptionalCursorPagination(LimitOffsetPagination):
+    """
+    По умолчанию limit/offset, как и во всём API.
+    Если в запросе передан параметр cursor (для первой страницы
+    пустой), выдача переключается на KeysetPagination.
+    """
+
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -13,6 +13,18 @@ class IsAdmin(permissions.BasePermission):
         )
 
 
+class IsModeratorOrAdmin(permissions.BasePermission):
+    """
+    Доступ предоставляется модератору и администратору.
+    """
+
+    def has_permission(self, request, view):
+        return (
+            request.user.is_authenticated
+            and (request.user.is_moderator or request.user.is_admin)
+        )
+
+
 class IsAdminOrReadOnly(permissions.BasePermission):
     """
     Полный доступ предоставляется только администратору,
@@ -38,7 +50,7 @@ class IsAuthorModeratorAdminOrReadOnly(permissions.BasePermission):
             request.method in permissions.SAFE_METHODS
             or request.user.is_authenticated
             and (
-                request.user == obj.author
+                obj.author_id == request.user.pk
                 or request.user.is_moderator
                 or request.user.is_admin
             )
@@ -1,9 +1,23 @@
-from django.conf import settings
+from functools import lru_cache
+from operator import itemgetter
 
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.encoding import smart_str
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
-
-from reviews.models import Category, Comment, Genre, Review, Title
+from rest_framework.settings import api_settings
+
+from api.v1.cache import bump_version_on_commit
+
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenreTitle,
+    Review,
+    Title
+)
 from users.models import User
 
 
@@ -89,13 +103,33 @@ class ReviewSerializer(serializers.ModelSerializer):
         request = self.context['request']
         if request.method != 'POST':
             return data
-        author = request.user
         title_id = self.context['request'].parser_context['kwargs']['title_id']
-        if Review.objects.filter(title_id=title_id, author=author).exists():
+        if Review.objects.filter(
+            title_id=title_id, author_id=request.user.pk
+        ).exists():
             raise ValidationError('Нельзя добавить более одного отзыва')
         return data
 
 
+class ReviewSearchSerializer(ReviewSerializer):
+    """
+    Класс для сериализации найденных Review.
+    Добавляет произведение, ранг совпадения и фрагмент текста
+    с подсвеченными словами запроса.
+    """
+
+    title = serializers.PrimaryKeyRelatedField(read_only=True)
+    rank = serializers.FloatField(
+        source='search_rank', read_only=True, allow_null=True
+    )
+    snippet = serializers.CharField(
+        source='search_snippet', read_only=True, allow_null=True
+    )
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ('title', 'rank', 'snippet')
+
+
 class CategorySerializer(serializers.ModelSerializer):
     """
     Серриализация модели Category.
@@ -116,22 +150,124 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
+class PreloadedSlugRelatedField(serializers.SlugRelatedField):
+    """
+    SlugRelatedField, который при массовой записи берёт объекты
+    из словаря slug -> объект, заранее загруженного корневым
+    сериализатором, а не выполняет запрос на каждый slug.
+    """
+
+    def to_internal_value(self, data):
+        preloaded = getattr(self.root, 'preloaded', {})
+        objects = preloaded.get(self.get_queryset().model)
+        if objects is None:
+            return super().to_internal_value(data)
+        try:
+            return objects[data]
+        except KeyError:
+            self.fail(
+                'does_not_exist',
+                slug_name=self.slug_field,
+                value=smart_str(data)
+            )
+        except TypeError:
+            self.fail('invalid')
+
+
+class TitleBulkListSerializer(serializers.ListSerializer):
+    """
+    Массовое создание произведений из списка.
+    Жанры и категории всех элементов проверяются двумя запросами,
+    произведения и связи с жанрами вставляются через bulk_create
+    в одной транзакции. Ошибки возвращаются списком по элементам.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            if len(data) > settings.TITLE_BULK_MAX_SIZE:
+                raise ValidationError({
+                    api_settings.NON_FIELD_ERRORS_KEY: [
+                        'Не больше {} произведений за запрос.'.format(
+                            settings.TITLE_BULK_MAX_SIZE
+                        )
+                    ]
+                })
+            self.preloaded = self.preload_slugs(data)
+        return super().to_internal_value(data)
+
+    @staticmethod
+    def preload_slugs(data):
+        genres, categories = set(), set()
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            if isinstance(item.get('genre'), list):
+                genres.update(
+                    slug for slug in item['genre'] if isinstance(slug, str)
+                )
+            if isinstance(item.get('category'), str):
+                categories.add(item['category'])
+        return {
+            Genre: Genre.objects.in_bulk(genres, field_name='slug'),
+            Category: Category.objects.in_bulk(
+                categories, field_name='slug'
+            ),
+        }
+
+    def create(self, validated_data):
+        titles = [
+            Title(**{
+                field: value for field, value in item.items()
+                if field != 'genre'
+            })
+            for item in validated_data
+        ]
+        with transaction.atomic():
+            if connection.features.can_return_ids_from_bulk_insert:
+                Title.objects.bulk_create(titles)
+            elif connection.vendor == 'sqlite':
+                Title.objects.bulk_create(titles)
+                # SQLite не возвращает id из bulk_create, но держит
+                # блокировку записи до конца транзакции: новые строки
+                # - последние по возрастающему id
+                ids = Title.objects.order_by('-pk').values_list(
+                    'pk', flat=True
+                )[:len(titles)]
+                for title, pk in zip(titles, sorted(ids)):
+                    title.pk = pk
+            else:
+                for title in titles:
+                    title.save()
+            GenreTitle.objects.bulk_create(
+                GenreTitle(title=title, genre=genre)
+                for title, item in zip(titles, validated_data)
+                for genre in set(item['genre'])
+            )
+        # bulk_create не отправляет post_save и m2m_changed
+        bump_version_on_commit(Title)
+        created = Title.objects.prefetch_related('genre').select_related(
+            'category'
+        ).in_bulk([title.pk for title in titles])
+        return [created[title.pk] for title in titles]
+
+
 class TitleWriteSerializer(serializers.ModelSerializer):
     """
     Серриализация модели Title для записи.
     """
 
-    genre = serializers.SlugRelatedField(
+    genre = PreloadedSlugRelatedField(
         slug_field='slug', many=True,
         queryset=Genre.objects.all()
     )
-    category = serializers.SlugRelatedField(
+    category = PreloadedSlugRelatedField(
         slug_field='slug',
         queryset=Category.objects.all()
     )
 
     class Meta:
         model = Title
+        list_serializer_class = TitleBulkListSerializer
         fields = (
             'id',
             'name',
@@ -162,3 +298,133 @@ class TitleReadSerializer(serializers.ModelSerializer):
             'genre',
             'category'
         )
+
+
+class ExpandedReviewSerializer(ReviewSerializer):
+    """
+    Отзыв внутри карточки произведения с числом комментариев.
+    """
+
+    comment_count = serializers.IntegerField(read_only=True)
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ('comment_count',)
+
+
+class TitleExpandedSerializer(TitleReadSerializer):
+    """
+    Карточка произведения с последними отзывами (?expand=reviews).
+    """
+
+    reviews = ExpandedReviewSerializer(
+        source='recent_reviews', many=True, read_only=True
+    )
+
+    class Meta(TitleReadSerializer.Meta):
+        fields = TitleReadSerializer.Meta.fields + ('reviews',)
+
+
+class TitleFastReadSerializer:
+    """
+    Быстрая сериализация списка произведений только для чтения.
+    Строки читаются через values() вместе с категорией, жанры страницы -
+    одним запросом, а JSON собирается по заранее составленному плану
+    полей без полей DRF на каждый атрибут.
+    Форма ответа совпадает с TitleReadSerializer, а context['fields']
+    сужает её так же, как ?fields= для обычных сериализаторов.
+    """
+
+    # (ключ в ответе, поле в values()) в порядке TitleReadSerializer
+    plan = (
+        ('id', 'id'),
+        ('name', 'name'),
+        ('year', 'year'),
+        ('rating', 'rating'),
+        ('description', 'description'),
+    )
+    fields = tuple(key for key, _ in plan) + ('genre', 'category')
+    category_fields = ('category__name', 'category__slug')
+
+    def __init__(self, instance=None, many=False, context=None, **kwargs):
+        self.instance = instance
+        self.many = many
+        self.plan = self.compile_plan((context or {}).get('fields'))
+
+    @classmethod
+    def compile_plan(cls, fields=None):
+        """
+        План для набора полей: ключи, функция выборки значений
+        из строки values() и признаки жанров и категории.
+        Повторы и порядок полей в запросе на план не влияют.
+        """
+
+        if fields is None:
+            return cls.build_plan(cls.fields)
+        return cls.build_plan(
+            tuple(field for field in cls.fields if field in fields)
+        )
+
+    # Ключи кеша - подмножества fields, больше 2 ** n планов не бывает
+    @classmethod
+    @lru_cache(maxsize=2 ** len(fields))
+    def build_plan(cls, fields):
+        keys = tuple(key for key, _ in cls.plan if key in fields)
+        sources = tuple(source for key, source in cls.plan if key in fields)
+        if len(sources) > 1:
+            get_values = itemgetter(*sources)
+        else:
+            def get_values(row):
+                return tuple(row[source] for source in sources)
+        return keys, sources, get_values, 'genre' in fields, (
+            'category' in fields
+        )
+
+    @classmethod
+    def get_queryset(cls, queryset, fields=None, required=('id',)):
+        """
+        Превращает queryset произведений в строки values() для плана.
+        required - поля, которые нужны помимо ответа (например,
+        для курсора пагинации).
+        """
+
+        _, sources, _, _, with_category = cls.compile_plan(fields)
+        values_fields = set(sources) | set(required) | {'id'}
+        if with_category:
+            values_fields.update(cls.category_fields)
+        return queryset.select_related(None).prefetch_related(None).values(
+            *values_fields
+        )
+
+    @staticmethod
+    def get_genres(title_ids):
+        genres = {}
+        links = GenreTitle.objects.filter(
+            title_id__in=title_ids
+        ).order_by('genre__slug').values_list(
+            'title_id', 'genre__name', 'genre__slug'
+        )
+        for title_id, name, slug in links:
+            genres.setdefault(title_id, []).append(
+                {'name': name, 'slug': slug}
+            )
+        return genres
+
+    @property
+    def data(self):
+        keys, _, get_values, with_genre, with_category = self.plan
+        rows = self.instance if self.many else [self.instance]
+        if with_genre:
+            genres = self.get_genres([row['id'] for row in rows])
+        data = []
+        for row in rows:
+            item = dict(zip(keys, get_values(row)))
+            if with_genre:
+                item['genre'] = genres.get(row['id'], [])
+            if with_category:
+                slug = row['category__slug']
+                item['category'] = None if slug is None else {
+                    'name': row['category__name'],
+                    'slug': slug
+                }
+            data.append(item)
+        return data if self.many else data[0]
@@ -0,0 +1,88 @@
+from rest_framework import permissions, serializers
+from rest_framework.exceptions import ValidationError
+
+
+class SparseFieldsMixin:
+    """
+    Параметр ?fields=a,b оставляет в ответе только перечисленные поля.
+    Если представление описывает sparse_columns (поле ответа -> столбцы
+    для only()), запрос тоже сужается: лишние столбцы не читаются,
+    а связи из sparse_select_related и sparse_prefetch_related
+    не подгружаются, пока их поле не запрошено. Столбцы из
+    sparse_required_columns читаются всегда (права, курсор).
+    """
+
+    fields_param = 'fields'
+    sparse_columns = None
+    sparse_required_columns = ()
+    sparse_select_related = {}
+    sparse_prefetch_related = {}
+
+    def get_allowed_fields(self):
+        if self.sparse_columns is not None:
+            return tuple(self.sparse_columns)
+        return tuple(self.get_serializer_class().Meta.fields)
+
+    def get_requested_fields(self):
+        """
+        Запрошенные поля или None, если ответ нужен целиком.
+        """
+
+        if not hasattr(self, '_requested_fields'):
+            self._requested_fields = None
+            value = self.request.query_params.get(self.fields_param)
+            if value and self.request.method in permissions.SAFE_METHODS:
+                fields = tuple(
+                    name.strip() for name in value.split(',') if name.strip()
+                )
+                unknown = set(fields) - set(self.get_allowed_fields())
+                if unknown:
+                    raise ValidationError({
+                        self.fields_param:
+                            f'Неизвестные поля: {", ".join(sorted(unknown))}'
+                    })
+                self._requested_fields = fields or None
+        return self._requested_fields
+
+    def narrow_queryset(self, queryset, fields):
+        columns = {queryset.model._meta.pk.name}
+        columns.update(self.sparse_required_columns)
+        for name in fields:
+            columns.update(self.sparse_columns[name])
+        queryset = queryset.select_related(None).prefetch_related(None)
+        select = [
+            relation for name, relation in self.sparse_select_related.items()
+            if name in fields
+        ]
+        if select:
+            queryset = queryset.select_related(*select)
+            columns.update(select)
+        return queryset.prefetch_related(*(
+            relation for name, relation
+            in self.sparse_prefetch_related.items()
+            if name in fields
+        )).only(*columns)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_requested_fields()
+        if fields is None or self.sparse_columns is None:
+            return queryset
+        return self.narrow_queryset(queryset, fields)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_requested_fields()
+        return context
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_requested_fields()
+        target = getattr(serializer, 'child', serializer)
+        # Быстрые сериализаторы сами читают context['fields']
+        if fields is not None and isinstance(
+            target, serializers.BaseSerializer
+        ):
+            for name in set(target.fields) - set(fields):
+                target.fields.pop(name)
+        return serializer
@@ -5,10 +5,16 @@ from api.v1.views import (
     CategoryViewSet,
     CommentViewSet,
     GenreViewSet,
+    ReviewSearchViewSet,
     ReviewViewSet,
     TitleViewSet,
     UsersViewSet,
+    batch,
+    export_comments,
+    export_reviews,
     get_token,
+    moderate_comments_view,
+    moderate_reviews_view,
     signup
 )
 
@@ -23,6 +29,9 @@ router_v1.register(
     ReviewViewSet, basename='reviews'
 )
 
+router_v1.register(
+    'reviews', ReviewSearchViewSet, basename='reviews-search'
+)
 router_v1.register('users', UsersViewSet, basename='users')
 router_v1.register('categories', CategoryViewSet, basename='categories')
 router_v1.register('genres', GenreViewSet, basename='genre')
@@ -33,7 +42,20 @@ auth_urlpatterns = [
     path('token/', get_token, name='token'),
 ]
 
+export_urlpatterns = [
+    path('reviews/', export_reviews, name='export-reviews'),
+    path('comments/', export_comments, name='export-comments'),
+]
+
+moderation_urlpatterns = [
+    path('reviews/', moderate_reviews_view, name='moderate-reviews'),
+    path('comments/', moderate_comments_view, name='moderate-comments'),
+]
+
 urlpatterns = [
     path('auth/', include(auth_urlpatterns)),
+    path('export/', include(export_urlpatterns)),
+    path('moderation/', include(moderation_urlpatterns)),
+    path('batch/', batch, name='batch'),
     path('', include(router_v1.urls)),
 ]
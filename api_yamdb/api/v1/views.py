@@ -2,43 +2,84 @@ from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
 from django.core.mail import send_mail
 from django.db import IntegrityError
-from django.db.models import Avg
+from django.db.models import Count, Q
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, mixins, viewsets, filters
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import (
+    AllowAny,
     IsAuthenticated,
     IsAuthenticatedOrReadOnly
 )
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework_simplejwt.tokens import AccessToken
 
-from api.v1.filters import TitleFilter
+from api.v1.batch import BatchSerializer, run_batch
+from api.v1.cache import CachedListMixin, ETagMixin
+from api.v1.export import (
+    COMMENT_EXPORT_PLAN,
+    REVIEW_EXPORT_PLAN,
+    ExportParamsSerializer,
+    iter_by_pub_date,
+    iter_titles,
+    streaming_response
+)
+from api.v1.filters import (
+    FullTextSearchFilter,
+    TitleFilter,
+    get_title_facets
+)
+from api.v1.moderation import (
+    ModerationSerializer,
+    moderate_comments,
+    moderate_reviews
+)
+from api.v1.pagination import OptionalCursorPagination
 from api.v1.permissions import (
     IsAdmin,
     IsAdminOrReadOnly,
-    IsAuthorModeratorAdminOrReadOnly
+    IsAuthorModeratorAdminOrReadOnly,
+    IsModeratorOrAdmin
 )
+from api.v1.sparse import SparseFieldsMixin
 from api.v1.serializers import (
     CategorySerializer,
     GenreSerializer,
+    TitleExpandedSerializer,
+    TitleFastReadSerializer,
     TitleReadSerializer,
     TitleWriteSerializer,
     ReviewSerializer,
+    ReviewSearchSerializer,
     CommentSerializer,
     SignupSerializer,
     UserSerializer,
     TokenSerializer,
 )
+from reviews.fts import to_match_query
 from reviews.models import (
     Category,
+    Comment,
     Genre,
     Title,
     Review,
 )
 from users.models import User
+from users.tokens import RoleAccessToken
+
+# Поля ответа об отзыве -> столбцы для only() при ?fields=
+REVIEW_SPARSE_COLUMNS = {
+    'id': ('id',),
+    'text': ('text',),
+    'author': ('author__username',),
+    'score': ('score',),
+    'pub_date': ('pub_date',),
+    'title': ('title',),
+    'rank': (),
+    'snippet': (),
+}
 
 
 @api_view(('POST',))
@@ -89,14 +130,106 @@ def get_token(request):
             'Передан некорректный код подтверждения',
             status=status.HTTP_400_BAD_REQUEST
         )
-    token = AccessToken.for_user(user)
+    token = RoleAccessToken.for_user(user)
     return Response(
         {'token': str(token)},
         status=status.HTTP_200_OK
     )
 
 
-class UsersViewSet(viewsets.ModelViewSet):
+def export_by_pub_date(request, queryset, plan, filename):
+    """
+    Потоковая выгрузка NDJSON с фильтрами since/until по pub_date.
+    Каждая строка содержит cursor: передав его в after,
+    прерванную выгрузку можно продолжить с места остановки.
+    """
+
+    params = ExportParamsSerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    return streaming_response(
+        iter_by_pub_date(queryset, plan, **params.validated_data),
+        'ndjson',
+        filename
+    )
+
+
+@api_view(('GET',))
+@permission_classes((IsAdmin,))
+def export_reviews(request):
+    """
+    Выгрузка всех отзывов в NDJSON.
+    """
+
+    return export_by_pub_date(
+        request, Review.objects.all(), REVIEW_EXPORT_PLAN, 'reviews'
+    )
+
+
+@api_view(('GET',))
+@permission_classes((IsAdmin,))
+def export_comments(request):
+    """
+    Выгрузка всех комментариев в NDJSON.
+    """
+
+    return export_by_pub_date(
+        request, Comment.objects.all(), COMMENT_EXPORT_PLAN, 'comments'
+    )
+
+
+def moderate(request, queryset, handler):
+    """
+    Массовая модерация: action (delete, hide, show) для записей
+    из списка ids или по фильтрам author, since, until.
+    """
+
+    serializer = ModerationSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    count = handler(
+        serializer.filter_queryset(queryset),
+        serializer.validated_data['action']
+    )
+    return Response({'count': count}, status=status.HTTP_200_OK)
+
+
+@api_view(('POST',))
+@permission_classes((IsModeratorOrAdmin,))
+def moderate_reviews_view(request):
+    """
+    Массовое удаление или скрытие отзывов.
+    """
+
+    return moderate(request, Review.objects.all(), moderate_reviews)
+
+
+@api_view(('POST',))
+@permission_classes((IsModeratorOrAdmin,))
+def moderate_comments_view(request):
+    """
+    Массовое удаление или скрытие комментариев.
+    """
+
+    return moderate(request, Comment.objects.all(), moderate_comments)
+
+
+@api_view(('POST',))
+@permission_classes((AllowAny,))
+def batch(request):
+    """
+    Несколько запросов к API за один HTTP-запрос.
+    Каждый вложенный запрос проходит собственные проверки прав
+    с авторизацией вызывающего, статусы возвращаются по элементам.
+    """
+
+    serializer = BatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    return Response(
+        run_batch(request, serializer.validated_data['requests']),
+        status=status.HTTP_200_OK
+    )
+
+
+class UsersViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """
     Работа с информацией о пользователях.
     """
@@ -115,6 +248,9 @@ class UsersViewSet(viewsets.ModelViewSet):
     )
     def me(self, request):
         instance = request.user
+        if not isinstance(instance, User):
+            # Пользователь восстановлен из токена, профиль читаем из базы
+            instance = get_object_or_404(User, pk=instance.pk)
         if request.method == 'GET':
             serializer = self.get_serializer(instance)
             return Response(serializer.data)
@@ -128,33 +264,70 @@ class UsersViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ETagMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     Работа с информацией обзора на произведение.
+    Произведение загружается не больше одного раза за запрос.
     """
 
-    serializer_class = ReviewSerializer
     permission_classes = (
         IsAuthorModeratorAdminOrReadOnly,
         IsAuthenticatedOrReadOnly
     )
+    pagination_class = OptionalCursorPagination
+    cursor_ordering = ('pub_date', 'id')
+    etag_models = (Review, Title, User)
+    sparse_columns = REVIEW_SPARSE_COLUMNS
+    sparse_required_columns = ('author', 'pub_date')
+    sparse_select_related = {'author': 'author'}
+    filter_backends = (FullTextSearchFilter,)
+    fts_table = 'reviews_review_fts'
+    fts_fallback_fields = ('text',)
+    fts_snippet_column = 0
+
+    def get_serializer_class(self):
+        """
+        При поиске по тексту отдаём ранг и фрагмент с подсветкой.
+        """
+
+        if (
+            self.action == 'list'
+            and FullTextSearchFilter.search_param in self.request.query_params
+        ):
+            return ReviewSearchSerializer
+        return ReviewSerializer
 
     def get_title(self):
-        return get_object_or_404(
-            Title,
-            pk=self.kwargs['title_id']
-        )
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title,
+                pk=self.kwargs['title_id']
+            )
+        return self._title
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return Review.objects.filter(
+            title_id=self.kwargs['title_id'], is_hidden=False
+        ).select_related('author')
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page:
+            # Непустая страница уже доказывает, что произведение есть
+            self.get_title()
+        return page
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        serializer.save(
+            author_id=self.request.user.pk,
+            title=self.get_title()
+        )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ETagMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     Работа с информацией комментария на обзор произведения.
+    Обзор загружается не больше одного раза за запрос.
     """
 
     serializer_class = CommentSerializer
@@ -162,19 +335,79 @@ class CommentViewSet(viewsets.ModelViewSet):
         IsAuthorModeratorAdminOrReadOnly,
         IsAuthenticatedOrReadOnly
     )
+    pagination_class = OptionalCursorPagination
+    cursor_ordering = ('pub_date', 'id')
+    etag_models = (Comment, Review, User)
+    sparse_columns = {
+        'id': ('id',),
+        'text': ('text',),
+        'author': ('author__username',),
+        'pub_date': ('pub_date',),
+    }
+    sparse_required_columns = ('author', 'pub_date')
+    sparse_select_related = {'author': 'author'}
 
     def get_review(self):
-        return get_object_or_404(
-            Review,
-            title_id=self.kwargs['title_id'],
-            pk=self.kwargs['review_id']
-        )
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review,
+                title_id=self.kwargs['title_id'],
+                pk=self.kwargs['review_id'],
+                is_hidden=False
+            )
+        return self._review
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        return Comment.objects.filter(
+            review_id=self.kwargs['review_id'],
+            review__title_id=self.kwargs['title_id'],
+            review__is_hidden=False,
+            is_hidden=False
+        ).select_related('author')
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page:
+            # Непустая страница уже доказывает, что обзор есть
+            self.get_review()
+        return page
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        serializer.save(
+            author_id=self.request.user.pk,
+            review=self.get_review()
+        )
+
+
+class ReviewSearchViewSet(
+    ETagMixin,
+    SparseFieldsMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet
+):
+    """
+    Полнотекстовый поиск отзывов по всем произведениям.
+    """
+
+    queryset = Review.objects.filter(is_hidden=False).select_related('author')
+    serializer_class = ReviewSearchSerializer
+    filter_backends = (FullTextSearchFilter,)
+    fts_table = 'reviews_review_fts'
+    fts_fallback_fields = ('text',)
+    fts_snippet_column = 0
+    etag_models = (Review, User)
+    sparse_columns = REVIEW_SPARSE_COLUMNS
+    sparse_required_columns = ('author',)
+    sparse_select_related = {'author': 'author'}
+
+    def list(self, request, *args, **kwargs):
+        search_param = FullTextSearchFilter.search_param
+        if not to_match_query(request.query_params.get(search_param, '')):
+            return Response(
+                {search_param: 'Укажите слова для поиска'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return super().list(request, *args, **kwargs)
 
 
 class CreateRetrieveDeleteViewSet(
@@ -186,9 +419,14 @@ class CreateRetrieveDeleteViewSet(
     pass
 
 
-class CategoryViewSet(CreateRetrieveDeleteViewSet):
+class CategoryViewSet(
+    CachedListMixin,
+    SparseFieldsMixin,
+    CreateRetrieveDeleteViewSet
+):
     """
     Работа со списком категорий.
+    Список кешируется до следующего изменения категорий.
     """
 
     queryset = Category.objects.order_by('slug')
@@ -199,9 +437,14 @@ class CategoryViewSet(CreateRetrieveDeleteViewSet):
     permission_classes = (IsAdminOrReadOnly,)
 
 
-class GenreViewSet(CreateRetrieveDeleteViewSet):
+class GenreViewSet(
+    CachedListMixin,
+    SparseFieldsMixin,
+    CreateRetrieveDeleteViewSet
+):
     """
     Работа со списком жанров.
+    Список кешируется до следующего изменения жанров.
     """
 
     queryset = Genre.objects.order_by('slug')
@@ -212,22 +455,156 @@ class GenreViewSet(CreateRetrieveDeleteViewSet):
     permission_classes = (IsAdminOrReadOnly,)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ETagMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     Работа со списком произведений.
     """
 
     queryset = Title.objects.prefetch_related('genre').select_related(
-        'category').annotate(rating=Avg('reviews__score')).order_by('name')
+        'category').order_by('name')
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
     permission_classes = (IsAdminOrReadOnly,)
+    pagination_class = OptionalCursorPagination
+    cursor_ordering = ('name', 'id')
+    expand_param = 'expand'
+    expandable = ('reviews',)
+    sparse_columns = {
+        'id': ('id',),
+        'name': ('name',),
+        'year': ('year',),
+        'rating': ('rating',),
+        'description': ('description',),
+        'genre': (),
+        'category': ('category__name', 'category__slug'),
+        'reviews': (),
+    }
+    sparse_required_columns = cursor_ordering
+    sparse_select_related = {'category': 'category'}
+    sparse_prefetch_related = {'genre': 'genre'}
+
+    def is_fast_list(self):
+        return self.action == 'list' and settings.TITLE_FAST_SERIALIZER
+
+    def get_expand(self):
+        """
+        Вложенные ресурсы карточки из ?expand=, только для retrieve.
+        """
+
+        if not hasattr(self, '_expand'):
+            self._expand = ()
+            value = self.request.query_params.get(self.expand_param)
+            if value and self.action == 'retrieve':
+                expand = tuple(
+                    name.strip() for name in value.split(',') if name.strip()
+                )
+                unknown = set(expand) - set(self.expandable)
+                if unknown:
+                    raise ValidationError({self.expand_param: (
+                        f'Неизвестные значения: {", ".join(sorted(unknown))}'
+                    )})
+                fields = self.get_requested_fields()
+                self._expand = tuple(
+                    name for name in expand
+                    if fields is None or name in fields
+                )
+        return self._expand
+
+    @property
+    def etag_models(self):
+        models = (Category, Genre, Review, Title)
+        if 'reviews' in self.get_expand():
+            # Автор и число комментариев во вложенных отзывах
+            models += (Comment, User)
+        return models
+
+    def get_object(self):
+        """
+        При ?expand=reviews к произведению добавляются последние
+        отзывы с авторами и числом комментариев одним запросом.
+        """
+
+        title = super().get_object()
+        if 'reviews' in self.get_expand():
+            title.recent_reviews = list(
+                title.reviews.filter(is_hidden=False).select_related(
+                    'author'
+                ).annotate(comment_count=Count(
+                    'comments', filter=Q(comments__is_hidden=False)
+                )).order_by('-pub_date', '-id')[
+                    :settings.TITLE_EXPANDED_REVIEWS
+                ]
+            )
+        return title
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.is_fast_list():
+            return TitleFastReadSerializer.get_queryset(
+                queryset, self.get_requested_fields(), self.cursor_ordering
+            )
+        return queryset
+
+    def paginate_queryset(self, queryset):
+        if self.action == 'list' and self.request.query_params.get('ids'):
+            # Список по id уже ограничен TITLE_IDS_MAX и идёт
+            # в порядке запроса: отдаём его целиком без COUNT(*)
+            return None
+        return super().paginate_queryset(queryset)
+
+    def get_serializer(self, *args, **kwargs):
+        """
+        Список в теле POST создаёт произведения массово.
+        """
+
+        if self.action == 'create' and isinstance(kwargs.get('data'), list):
+            kwargs.update(many=True, allow_empty=False)
+        return super().get_serializer(*args, **kwargs)
 
     def get_serializer_class(self):
         """
         Выбор серриализатора для чтения или записи.
         """
 
+        if self.is_fast_list():
+            return TitleFastReadSerializer
+        if 'reviews' in self.get_expand():
+            return TitleExpandedSerializer
         if self.action in ('list', 'retrieve'):
             return TitleReadSerializer
         return TitleWriteSerializer
+
+    @action(detail=False, methods=('get',), url_path='facets')
+    def facets(self, request):
+        """
+        Число произведений по жанрам, категориям и годам
+        для текущих параметров фильтрации.
+        """
+
+        return self.conditional_response(self.facets_response, request)
+
+    def facets_response(self, request):
+        return Response(self.cached_data(
+            'facets',
+            lambda: get_title_facets(
+                request.query_params, Title.objects.all()
+            )
+        ))
+
+    @action(
+        detail=False,
+        methods=('get',),
+        url_path='export',
+        permission_classes=(IsAdmin,)
+    )
+    def export(self, request):
+        """
+        Потоковая выгрузка всего каталога (с учётом фильтров)
+        в JSON-массиве или NDJSON (?output=ndjson).
+        """
+
+        return streaming_response(
+            iter_titles(self.filter_queryset(self.get_queryset())),
+            request.query_params.get('output'),
+            'titles'
+        )
@@ -64,6 +64,18 @@ DATABASES = {
     }
 }
 
+# Версии данных для ETag и кеша ответов хранятся в кеше default,
+# поэтому он должен быть общим для всех процессов сервера.
+# LocMemCache годится только для одного процесса (runserver, тесты)
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -81,7 +93,7 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.TokenClaimsAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 5,
@@ -90,6 +102,7 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_USER_CLASS': 'users.tokens.RoleTokenUser',
 }
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
@@ -115,3 +128,33 @@ UNUSED_USERNAME = 'me'
 FROM = 'noreply@noreply.com'
 
 CONFINES_TEXT = 10
+
+CURSOR_MAX_PAGE_SIZE = 100
+
+LIST_CACHE_TIMEOUT = 60 * 60
+
+TITLE_FAST_SERIALIZER = True
+
+TITLE_EXPANDED_REVIEWS = 5
+
+TITLE_BULK_MAX_SIZE = 500
+
+TITLE_IDS_MAX = 50
+
+BATCH_MAX_REQUESTS = 20
+
+BATCH_MAX_WORKERS = 4
+
+MODERATION_BATCH_SIZE = 500
+
+MODERATION_MAX_IDS = 1000
+
+IMPORT_BATCH_SIZE = 1000
+
+# None - по числу ядер процессора
+IMPORT_WORKERS = None
+
+# Кеш страниц SQLite для import_csv --fast, КБ
+IMPORT_SQLITE_CACHE_KB = 256 * 1024
+
+EXPORT_CHUNK_SIZE = 1000
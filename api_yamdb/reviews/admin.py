@@ -15,8 +15,9 @@ class ReviewAdmin(admin.ModelAdmin):
         'title',
         'pub_date',
         'score',
+        'is_hidden',
     )
-    list_filter = ('title',)
+    list_filter = ('title', 'is_hidden')
     search_fields = ('title',)
 
 
@@ -31,8 +32,9 @@ class CommentAdmin(admin.ModelAdmin):
         'review',
         'author',
         'pub_date',
+        'is_hidden',
     )
-    list_filter = ('pub_date',)
+    list_filter = ('pub_date', 'is_hidden')
     search_fields = ('pub_date',)
 
 
@@ -46,7 +48,9 @@ class TitleAdmin(admin.ModelAdmin):
         'id',
         'name',
         'year',
-        'category'
+        'category',
+        'rating',
+        'review_count'
     )
     search_fields = ('name', 'description')
     list_filter = ('name', 'year',)
@@ -0,0 +1,69 @@
+import re
+
+from django.db import connection
+from django.db.models import CharField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+# Слова запроса: всё, что FTS5 со словарём unicode61 считает токенами
+WORD_RE = re.compile(r'\w+')
+
+# Длина фрагмента с подсветкой в токенах
+SNIPPET_TOKENS = 16
+
+
+def to_match_query(text):
+    """
+    Превращает пользовательский ввод в безопасный запрос MATCH.
+    Каждое слово берётся в кавычки и ищется по префиксу,
+    поэтому синтаксис FTS5 во вводе не интерпретируется.
+    """
+
+    return ' '.join(f'"{word}"*' for word in WORD_RE.findall(text))
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def fts_search(queryset, fts_table, text, fallback_fields,
+               snippet_column=None):
+    """
+    Полнотекстовый поиск по таблице FTS5, связанной с моделью по rowid.
+    Найденные строки получают search_rank (меньше - релевантнее)
+    и упорядочиваются по нему. Если задан snippet_column, в search_snippet
+    попадает фрагмент этого столбца с подсвеченными совпадениями.
+    На других СУБД поиск сводится к icontains по fallback_fields.
+    """
+
+    match = to_match_query(text)
+    if not match:
+        return queryset
+    if not fts_available():
+        condition = Q()
+        for field in fallback_fields:
+            condition |= Q(**{f'{field}__icontains': text})
+        queryset = queryset.filter(condition).annotate(
+            search_rank=Value(None, output_field=FloatField())
+        )
+        if snippet_column is not None:
+            queryset = queryset.annotate(
+                search_snippet=Value(None, output_field=CharField())
+            )
+        return queryset
+    # Таблица FTS5 присоединяется один раз: MATCH выполняется
+    # в одном проходе, а rank и snippet читаются из той же строки.
+    # Связь по rowid задана через filter, а не сырым SQL, чтобы
+    # псевдоним модели переименовывался внутри подзапросов
+    select = {'search_rank': f'{fts_table}.rank'}
+    if snippet_column is not None:
+        select['search_snippet'] = (
+            f"snippet({fts_table}, {snippet_column}, "
+            f"'<mark>', '</mark>', '…', {SNIPPET_TOKENS})"
+        )
+    queryset = queryset.extra(
+        select=select,
+        tables=(fts_table,),
+        where=(f'{fts_table} MATCH %s',),
+        params=(match,)
+    ).filter(pk=RawSQL(f'{fts_table}.rowid', ()))
+    return queryset.order_by('search_rank', 'pk')
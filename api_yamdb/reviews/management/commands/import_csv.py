@@ -1,16 +1,275 @@
 import contextlib
 import csv
+import hashlib
+import multiprocessing
 import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from queue import Empty
 
+import django
 from django.apps import apps
 from django.conf import settings
 from django.core.management import call_command
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from reviews.models import ImportCheckpoint
+from reviews.signals import data_imported, deferred_rating
+
+MODES = ('replace', 'upsert')
+# Сколько разобранных пачек одного файла может ждать записи
+QUEUE_BATCHES = 4
+# Как часто писатель проверяет, жив ли обработчик, секунды
+QUEUE_POLL = 1
+DIGEST_CHUNK = 1024 * 1024
+# Прагмы SQLite, которые --fast меняет на время загрузки
+FAST_PRAGMAS = ('journal_mode', 'synchronous', 'cache_size')
+
+
+class OffsetLines:
+    """
+    Строки двоичного файла для csv.reader. csv читает файл построчно
+    и без упреждения, поэтому после каждой записи offset указывает
+    на байт, с которого начинается следующая.
+    """
+
+    def __init__(self, binary, offset=0):
+        self.binary = binary
+        self.offset = offset
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.binary.readline()
+        if not line:
+            raise StopIteration
+        self.offset += len(line)
+        return line.decode('utf-8')
+
+
+def parse_batches(path_to_file, model, batch_size, offset=0):
+    """
+    Строки csv пачками по batch_size в виде словарей, значения
+    приведены к типам полей модели. В памяти держится одна пачка.
+    Вместе с пачкой отдаётся смещение конца её последней строки;
+    offset продолжает разбор с такого смещения.
+    """
+
+    with open(path_to_file, 'rb') as binary:
+        lines = OffsetLines(binary)
+        fieldnames = next(csv.reader(lines))
+        if offset:
+            binary.seek(offset)
+            lines.offset = offset
+
+        # Читаем csv построчно, не загружая файл целиком
+        reader = csv.DictReader(lines, fieldnames=fieldnames)
+        fields = {
+            name: model._meta.get_field(name) for name in fieldnames
+        }
+        while True:
+            batch = [
+                {
+                    name: fields[name].to_python(value)
+                    for name, value in row.items()
+                }
+                for row in islice(reader, batch_size)
+            ]
+            if not batch:
+                return
+            yield batch, lines.offset
+
+
+def file_digest(path_to_file):
+    digest = hashlib.sha256()
+    with open(path_to_file, 'rb') as binary:
+        for chunk in iter(lambda: binary.read(DIGEST_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_ids(path_to_file, model):
+    pk = model._meta.pk
+    with open(path_to_file, newline='') as csvfile:
+        return {
+            pk.to_python(row[pk.attname]) for row in csv.DictReader(csvfile)
+        }
+
+
+@contextlib.contextmanager
+def file_dates(model, columns):
+    """
+    bulk_create ставит now() в поля auto_now и auto_now_add,
+    и upsert находил бы отличия от файла в каждой такой строке.
+    На время записи эти поля из columns берут значение из файла.
+    """
+
+    fields = [
+        field for field in model._meta.concrete_fields
+        if field.name in columns
+        and (getattr(field, 'auto_now', False)
+             or getattr(field, 'auto_now_add', False))
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def init_worker():
+    # При запуске процессов через spawn Django нужно настроить заново
+    if not apps.ready:
+        django.setup()
+
+
+def parse_to_queue(path_to_file, label, batch_size, offset, queue):
+    """
+    Разбор файла в процессе-обработчике. Пачки уходят в очередь
+    ограниченного размера, конец файла отмечается None,
+    а ошибка разбора передаётся писателю вместо пачки.
+    """
+
+    try:
+        model = apps.get_model(label)
+        for item in parse_batches(path_to_file, model, batch_size, offset):
+            queue.put(item)
+    except Exception as error:
+        queue.put(error)
+        return
+    queue.put(None)
+
+
+def iter_queue(queue, future):
+    """
+    Пачки из очереди обработчика. Если процесс погиб, не отправив
+    конец файла (OOM, os._exit), ждать нечего: поднимается ошибка
+    его задачи, обычно BrokenProcessPool.
+    """
+
+    while True:
+        try:
+            item = queue.get(timeout=QUEUE_POLL)
+        except Empty:
+            if not future.done():
+                continue
+            raise future.exception() or CommandError(
+                'Обработчик завершился, не передав конец файла'
+            )
+        if item is None:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def dependencies(models):
+    """
+    Граф зависимостей по внешним ключам: модель -> модели
+    из того же набора, на которые она ссылается.
+    """
+
+    return {
+        model: {
+            field.related_model for field in model._meta.concrete_fields
+            if field.is_relation and field.related_model in models
+            and field.related_model is not model
+        }
+        for model in models
+    }
+
+
+def write_order(models):
+    """
+    Модели в порядке записи: каждая после тех, на которые ссылается.
+    При равенстве сохраняется исходный порядок.
+    """
+
+    graph = dependencies(models)
+    order = []
+    while len(order) < len(models):
+        ready = [
+            model for model in models
+            if model not in order and graph[model] <= set(order)
+        ]
+        if not ready:
+            raise CommandError(
+                'Циклическая зависимость между таблицами: ' + ', '.join(
+                    model._meta.label for model in models
+                    if model not in order
+                )
+            )
+        order.append(ready[0])
+    return order
+
+
+def secondary_indexes(models):
+    """
+    Неуникальные индексы таблиц моделей в виде имя -> SQL, в том
+    виде, в каком их создаёт Django. Уникальные индексы не входят:
+    без них загрузка не проверяла бы ограничения.
+    """
+
+    editor = connection.schema_editor()
+    return {
+        str(statement.parts['name']).strip('"'): str(statement)
+        for model in models
+        for statement in editor._model_indexes_sql(model)
+    }
+
+
+def existing_indexes(cursor):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    return {name for name, in cursor.fetchall()}
+
+
+@contextlib.contextmanager
+def sqlite_bulk_load(models, cache_kb):
+    """
+    Настройки SQLite на время массовой загрузки. Журнал ведётся
+    в памяти, поэтому откат пачки при ошибке работает, но сбой
+    процесса может повредить файл БД; синхронная запись на диск
+    отключена. Вторичные индексы удаляются и строятся заново
+    на выходе, в том числе при ошибке, затем возвращаются прежние
+    прагмы. После успешной загрузки собирается статистика ANALYZE.
+    """
+
+    indexes = secondary_indexes(models)
+    with connection.cursor() as cursor:
+        saved = {}
+        for name in FAST_PRAGMAS:
+            cursor.execute(f'PRAGMA {name}')
+            saved[name] = cursor.fetchone()[0]
+        cursor.execute('PRAGMA journal_mode = MEMORY')
+        cursor.execute('PRAGMA synchronous = OFF')
+        cursor.execute(f'PRAGMA cache_size = {-cache_kb}')
+        for name in sorted(indexes.keys() & existing_indexes(cursor)):
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            # Создаются все недостающие индексы: так повторный запуск
+            # исправляет и прерванную на середине загрузку
+            for name in sorted(indexes.keys() - existing_indexes(cursor)):
+                cursor.execute(indexes[name])
+            for name, value in saved.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
 
 
 class Command(BaseCommand):
     help = '''Загрузка тестовой информации из csv-файла в базу данных.
-    Вся существующая информация будет удалена из базы данных.'''
+    В режиме replace вся существующая информация будет удалена
+    из базы данных, в режиме upsert меняются только отличия.'''
 
     # имя файла с данными, приложение, модель
     DATA = (
@@ -22,47 +281,327 @@ class Command(BaseCommand):
         ('comments.csv', 'reviews', 'Comment'),
         ('genre_title.csv', 'reviews', 'GenreTitle'),
     )
+    # Таблицы каталога, из которых --delete-missing удаляет строки.
+    # Пользователи, отзывы и комментарии создаются и через API,
+    # поэтому их отсутствие в файлах ничего не значит
+    DELETE_MISSING = (
+        'category.csv', 'genre.csv', 'titles.csv', 'genre_title.csv'
+    )
 
-    def handle(self, *args, **kwargs):
-        message = 'Данные добавлены!'
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-dir',
+            default=os.path.join(settings.BASE_DIR, 'static', 'data'),
+            help='Каталог с csv-файлами.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.IMPORT_BATCH_SIZE,
+            help='Сколько строк читать и вставлять за один раз.'
+        )
+        parser.add_argument(
+            '--mode',
+            choices=MODES,
+            default='replace',
+            help=(
+                'replace - очистить базу и загрузить заново, '
+                'upsert - добавить новые и обновить изменённые строки.'
+            )
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.IMPORT_WORKERS or min(
+                len(self.DATA), os.cpu_count() or 1
+            ),
+            help=(
+                'Сколько процессов разбирают файлы; 1 - разбор '
+                'в текущем процессе.'
+            )
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help=(
+                'Продолжить прерванную загрузку с последней контрольной '
+                'точки, если файлы не изменились.'
+            )
+        )
+        parser.add_argument(
+            '--delete-missing',
+            action='store_true',
+            help=(
+                'В режиме upsert удалить из таблиц каталога (категории, '
+                'жанры, произведения) строки, которых нет в файлах.'
+            )
+        )
+        parser.add_argument(
+            '--fast',
+            action='store_true',
+            help=(
+                'Только SQLite: ускорить загрузку прагмами и перестройкой '
+                'индексов в конце. Сбой во время загрузки может '
+                'повредить файл БД.'
+            )
+        )
 
-        # Если БД существует, очищаем её таблицы от данных
-        with contextlib.suppress(ValueError):
-            call_command('flush', '--no-input')
+    def import_table(self, model, batches, checkpoint):
+        """
+        Вставка пачек одного файла. Каждая пачка коммитится
+        вместе с контрольной точкой.
+        """
 
-        # Выполняем миграции
-        call_command('migrate')
+        stats = Counter()
+        for batch, offset in batches:
+            with transaction.atomic(), file_dates(model, batch[0]):
+                model.objects.bulk_create([model(**row) for row in batch])
+                checkpoint.advance(offset, len(batch))
+            stats['rows'] += len(batch)
+            stats['created'] += len(batch)
+        return stats
 
-        # Импорт данных из файлов в БД
+    def upsert_table(self, model, batches, checkpoint):
+        """
+        Сверка пачек с таблицей по id: новые строки вставляются,
+        изменённые обновляются через bulk_update. Каждая пачка
+        коммитится вместе с контрольной точкой.
+        """
+
+        stats = Counter()
+        for rows, offset in batches:
+            batch = [model(**row) for row in rows]
+            columns = [
+                model._meta.get_field(name) for name in rows[0]
+                if not model._meta.get_field(name).primary_key
+            ]
+            with transaction.atomic(), file_dates(model, rows[0]):
+                existing = model.objects.in_bulk([obj.pk for obj in batch])
+                created, changed = [], []
+                for obj in batch:
+                    old = existing.get(obj.pk)
+                    if old is None:
+                        created.append(obj)
+                    elif any(
+                        getattr(obj, field.attname)
+                        != getattr(old, field.attname)
+                        for field in columns
+                    ):
+                        changed.append(obj)
+                model.objects.bulk_create(created)
+                if changed:
+                    model.objects.bulk_update(
+                        changed, [field.name for field in columns]
+                    )
+                checkpoint.advance(offset, len(batch))
+            stats['rows'] += len(batch)
+            stats['created'] += len(created)
+            stats['updated'] += len(changed)
+        return stats
+
+    @staticmethod
+    def delete_missing(model, seen, batch_size):
+        """
+        Удаляет пачками строки, id которых нет среди загруженных.
+        """
+
+        deleted = 0
+        last = None
+        queryset = model.objects.order_by('pk').values_list('pk', flat=True)
+        while True:
+            page = queryset if last is None else queryset.filter(pk__gt=last)
+            ids = list(page[:batch_size])
+            if not ids:
+                return deleted
+            last = ids[-1]
+            missing = [pk for pk in ids if pk not in seen]
+            if missing:
+                # Рейтинг пересчитывается один раз в конце импорта
+                with deferred_rating():
+                    model.objects.filter(pk__in=missing).delete()
+                deleted += len(missing)
+
+    def get_checkpoint(self, fixture, path_to_file, resume):
+        """
+        Контрольная точка файла. При --resume загрузка продолжается
+        с сохранённого смещения, если файл не изменился;
+        для уже загруженного файла возвращается None.
+        """
+
+        digest = file_digest(path_to_file)
+        checkpoint, created = ImportCheckpoint.objects.get_or_create(
+            fixture=fixture, defaults={'digest': digest}
+        )
+        if not resume or created:
+            return checkpoint
+        if checkpoint.digest != digest:
+            raise CommandError(
+                f'Файл {fixture} изменился после прерванной загрузки, '
+                f'запустите импорт заново без --resume'
+            )
+        if checkpoint.finished:
+            self.stdout.write(f'{fixture}: уже загружен, пропускаем')
+            return None
+        if checkpoint.rows:
+            self.stdout.write(
+                f'{fixture}: продолжаем после {checkpoint.rows} строк'
+            )
+        return checkpoint
+
+    def write_table(self, job, batches, options):
+        """
+        Запись одного файла единственным соединением с БД и отчёт.
+        """
+
+        fixture, model, path_to_file, checkpoint = job
+        started = time.monotonic()
+        if options['mode'] == 'upsert':
+            stats = self.upsert_table(model, batches, checkpoint)
+        else:
+            stats = self.import_table(model, batches, checkpoint)
+        with transaction.atomic():
+            if (
+                options['mode'] == 'upsert' and options['delete_missing']
+                and fixture in self.DELETE_MISSING
+            ):
+                stats['deleted'] = self.delete_missing(
+                    model, file_ids(path_to_file, model),
+                    options['batch_size']
+                )
+            checkpoint.finished = True
+            checkpoint.save(update_fields=('finished',))
+        elapsed = time.monotonic() - started
+        report = (
+            f'{fixture}: {stats["rows"]} строк за {elapsed:.2f} с '
+            f'({stats["rows"] / max(elapsed, 1e-6):.0f} строк/с)'
+        )
+        if options['mode'] == 'upsert':
+            report += (
+                f', новых: {stats["created"]}, '
+                f'изменено: {stats["updated"]}, '
+                f'удалено: {stats["deleted"]}'
+            )
+        self.stdout.write(report)
+
+    def import_serial(self, jobs, options):
+        for job in jobs:
+            _, model, path_to_file, checkpoint = job
+            self.write_table(job, parse_batches(
+                path_to_file, model, options['batch_size'], checkpoint.offset
+            ), options)
+
+    def import_parallel(self, jobs, options):
+        """
+        Файлы разбираются в процессах-обработчиках одновременно,
+        а пишет в БД только текущий процесс, в порядке зависимостей.
+        Задачи ставятся в том же порядке, поэтому файл, который
+        писатель ждёт, всегда получает свободный процесс.
+        """
+
+        with ProcessPoolExecutor(
+            options['workers'], initializer=init_worker
+        ) as executor:
+            # Менеджер закрывается первым: при ошибке записи процессы,
+            # ждущие места в очереди, получат ошибку и завершатся
+            with multiprocessing.Manager() as manager:
+                parsers = []
+                for _, model, path_to_file, checkpoint in jobs:
+                    queue = manager.Queue(QUEUE_BATCHES)
+                    future = executor.submit(
+                        parse_to_queue, path_to_file, model._meta.label,
+                        options['batch_size'], checkpoint.offset, queue
+                    )
+                    parsers.append((queue, future))
+                for job, (queue, future) in zip(jobs, parsers):
+                    self.write_table(job, iter_queue(queue, future), options)
+
+    def get_tables(self, data_dir):
+        """
+        Файлы и модели из DATA в порядке записи по графу внешних ключей.
+        Возвращает список и сообщение об ошибке, если она есть.
+        """
+
+        tables = []
         for fixture, app, model in self.DATA:
 
             # Импортрируем модель
             try:
                 current_model = apps.get_model(app, model)
             except LookupError:
-                message = (f'Данные не добавлены!!! '
-                           f'Ошибка в наименованиях приложений и моделей: '
-                           f'{app}, {model}')
-                break
+                return tables, (
+                    f'Данные не добавлены!!! '
+                    f'Ошибка в наименованиях приложений и моделей: '
+                    f'{app}, {model}'
+                )
 
             # Получаем полный путь до файла с данными
-            path_to_file = os.path.join(
-                settings.BASE_DIR, 'static', 'data', fixture
-            )
+            path_to_file = os.path.join(data_dir, fixture)
             if not os.path.exists(path_to_file):
-                message = (f'Данные не добавлены!!! '
-                           f'Такой файл не существует: {path_to_file}')
-                break
+                return tables, (
+                    f'Данные не добавлены!!! '
+                    f'Такой файл не существует: {path_to_file}'
+                )
+            tables.append((fixture, current_model, path_to_file))
 
-            with open(path_to_file, newline='') as csvfile:
+        order = write_order([model for _, model, _ in tables])
+        tables.sort(key=lambda table: order.index(table[1]))
+        return tables, None
 
-                # Получаем данные из csv файла
-                reader = csv.DictReader(csvfile)
+    def bulk_load(self, models, fast):
+        """
+        Контекст загрузки: с --fast на SQLite - sqlite_bulk_load,
+        иначе ничего не меняется.
+        """
+
+        if not fast:
+            return contextlib.nullcontext()
+        if connection.vendor != 'sqlite':
+            self.stdout.write(
+                f'--fast поддерживается только для SQLite, '
+                f'для {connection.vendor} загрузка идёт как обычно'
+            )
+            return contextlib.nullcontext()
+        return sqlite_bulk_load(models, settings.IMPORT_SQLITE_CACHE_KB)
+
+    def handle(self, *args, **options):
+        # Проверяем до очистки БД: при 0 файлы не дали бы ни одной пачки
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть не меньше 1')
+        tables, error = self.get_tables(options['data_dir'])
+        if error:
+            self.stdout.write(error)
+            return
+
+        if not options['resume']:
+            if options['mode'] != 'upsert':
+                # Если БД существует, очищаем её таблицы от данных
+                with contextlib.suppress(ValueError):
+                    call_command('flush', '--no-input')
+
+                # Выполняем миграции
+                call_command('migrate')
+            ImportCheckpoint.objects.all().delete()
+
+        jobs = []
+        for fixture, model, path_to_file in tables:
+            checkpoint = self.get_checkpoint(
+                fixture, path_to_file, options['resume']
+            )
+            if checkpoint is not None:
+                jobs.append((fixture, model, path_to_file, checkpoint))
+
+        # Импорт данных из файлов в БД
+        models = [model for _, model, _ in tables]
+        with self.bulk_load(models, options['fast']):
+            if options['workers'] > 1:
+                self.import_parallel(jobs, options)
+            else:
+                self.import_serial(jobs, options)
 
-                # Формируем список данных
-                bulk_data = [current_model(**row) for row in reader]
+        # bulk_create не вызывает сигналы, пересчитываем рейтинг
+        apps.get_model('reviews', 'Title').objects.refresh_rating()
 
-                # Сохраняем данные в БД
-                current_model.objects.bulk_create(bulk_data)
+        # Сообщаем, что данные изменились в обход сигналов моделей
+        data_imported.send(sender=self.__class__)
 
-        self.stdout.write(message)
+        self.stdout.write('Данные добавлены!')
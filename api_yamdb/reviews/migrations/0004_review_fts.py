@@ -0,0 +1,64 @@
+from django.db import migrations
+
+FORWARD_SQL = (
+    """
+    CREATE VIRTUAL TABLE reviews_review_fts USING fts5(
+        text,
+        content='reviews_review', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER reviews_review_fts_insert AFTER INSERT ON reviews_review
+    BEGIN
+        INSERT INTO reviews_review_fts(rowid, text)
+        VALUES (new.id, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER reviews_review_fts_delete AFTER DELETE ON reviews_review
+    BEGIN
+        INSERT INTO reviews_review_fts(reviews_review_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER reviews_review_fts_update
+    AFTER UPDATE OF text ON reviews_review
+    BEGIN
+        INSERT INTO reviews_review_fts(reviews_review_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO reviews_review_fts(rowid, text)
+        VALUES (new.id, new.text);
+    END
+    """,
+    "INSERT INTO reviews_review_fts(reviews_review_fts) VALUES ('rebuild')",
+)
+
+BACKWARD_SQL = (
+    'DROP TRIGGER IF EXISTS reviews_review_fts_insert',
+    'DROP TRIGGER IF EXISTS reviews_review_fts_delete',
+    'DROP TRIGGER IF EXISTS reviews_review_fts_update',
+    'DROP TABLE IF EXISTS reviews_review_fts',
+)
+
+
+def run_sqlite(statements):
+    def run(apps, schema_editor):
+        # Полнотекстовый индекс FTS5 есть только в SQLite
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_title_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sqlite(FORWARD_SQL), run_sqlite(BACKWARD_SQL)),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:58
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+review_fts = import_module('reviews.migrations.0004_review_fts')
+
+# SQLite пересоздаёт таблицу отзывов при добавлении столбца,
+# вместе со старой таблицей пропадают и триггеры индекса FTS5
+TRIGGERS_SQL = tuple(
+    statement for statement in review_fts.FORWARD_SQL
+    if 'CREATE TRIGGER' in statement
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_pub_date_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            migrations.RunPython.noop, review_fts.run_sqlite(TRIGGERS_SQL)
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='is_hidden',
+            field=models.BooleanField(default=False, verbose_name='Скрыт модератором'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='is_hidden',
+            field=models.BooleanField(default=False, verbose_name='Скрыт модератором'),
+        ),
+        migrations.RunPython(
+            review_fts.run_sqlite(TRIGGERS_SQL), migrations.RunPython.noop
+        ),
+    ]
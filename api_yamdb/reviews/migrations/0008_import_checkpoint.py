@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_moderation_hidden'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fixture', models.CharField(max_length=255, unique=True, verbose_name='Файл')),
+                ('digest', models.CharField(max_length=64, verbose_name='SHA-256 файла')),
+                ('offset', models.BigIntegerField(default=0, verbose_name='Смещение в байтах')),
+                ('rows', models.PositiveIntegerField(default=0, verbose_name='Загружено строк')),
+                ('finished', models.BooleanField(default=False, verbose_name='Загружен полностью')),
+            ],
+            options={
+                'verbose_name': 'Контрольная точка импорта',
+                'verbose_name_plural': 'Контрольные точки импорта',
+            },
+        ),
+    ]
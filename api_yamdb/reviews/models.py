@@ -1,6 +1,8 @@
 from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, ExpressionWrapper, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 
 from reviews.validators import validate_title_year
 from users.models import User
@@ -52,9 +54,40 @@ class Genre(models.Model):
         return self.name
 
 
+class TitleQuerySet(models.QuerySet):
+    """
+    Набор запросов для произведений.
+    """
+
+    def refresh_rating(self):
+        """
+        Пересчитывает денормализованный рейтинг по таблице отзывов.
+        Нужен после массовых операций, которые обходят сигналы
+        (bulk_create, update, импорт из csv, модерация).
+        Скрытые модератором отзывы в рейтинге не учитываются.
+        """
+
+        reviews = Review.objects.filter(
+            title=OuterRef('pk'), is_hidden=False
+        ).order_by().values('title')
+        score_sum = reviews.annotate(value=Sum('score')).values('value')
+        review_count = reviews.annotate(value=Count('id')).values('value')
+        rating = reviews.annotate(value=ExpressionWrapper(
+            Sum('score') / Count('id'),
+            output_field=models.IntegerField()
+        )).values('value')
+        return self.update(
+            score_sum=Coalesce(Subquery(score_sum), 0),
+            review_count=Coalesce(Subquery(review_count), 0),
+            rating=Subquery(rating)
+        )
+
+
 class Title(models.Model):
     """
     Модель для создания произведений, к которым пишут отзывы.
+    Поля rating, review_count и score_sum поддерживаются
+    сигналами модели Review, а не считаются при каждом запросе.
     """
 
     category = models.ForeignKey(
@@ -80,10 +113,36 @@ class Title(models.Model):
         verbose_name='Год создания',
         validators=(validate_title_year,)
     )
+    rating = models.PositiveSmallIntegerField(
+        verbose_name='Рейтинг',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    review_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+        editable=False
+    )
+    score_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = (
+            models.Index(fields=('name',), name='title_name_idx'),
+            models.Index(fields=('year', 'name'), name='title_year_name_idx'),
+            models.Index(
+                fields=('category', 'name'),
+                name='title_category_name_idx'
+            ),
+        )
 
     def __str__(self):
         return self.name
@@ -105,6 +164,14 @@ class GenreTitle(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('genre', 'title'),
+                name='unique_genre_title'
+            ),
+        )
+
 
 class Review(models.Model):
     """
@@ -135,6 +202,10 @@ class Review(models.Model):
             MaxValueValidator(10, 'Допустимы значения от 1 до 10')
         )
     )
+    is_hidden = models.BooleanField(
+        verbose_name='Скрыт модератором',
+        default=False
+    )
 
     class Meta:
         verbose_name = 'Отзыв'
@@ -145,10 +216,38 @@ class Review(models.Model):
                 name='unique_review'
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('title', 'pub_date'),
+                name='review_title_pub_date_idx'
+            ),
+            models.Index(fields=('pub_date',), name='review_pub_date_idx'),
+        )
 
     def __str__(self):
         return self.text[:settings.CONFINES_TEXT]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Запоминаем загруженные значения, чтобы при изменении оценки
+        поправить рейтинг произведения на разницу без пересчёта.
+        """
+
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Отзыв и рейтинг произведения меняются в одной транзакции
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+        self._loaded_values = {
+            'title_id': self.title_id,
+            'score': self.score,
+            'is_hidden': self.is_hidden,
+        }
+
 
 class Comment(models.Model):
     """
@@ -172,10 +271,63 @@ class Comment(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True,
     )
+    is_hidden = models.BooleanField(
+        verbose_name='Скрыт модератором',
+        default=False
+    )
 
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('review', 'pub_date'),
+                name='comment_review_pub_date_idx'
+            ),
+            models.Index(fields=('pub_date',), name='comment_pub_date_idx'),
+        )
 
     def __str__(self):
         return self.text[:settings.CONFINES_TEXT]
+
+
+class ImportCheckpoint(models.Model):
+    """
+    Ход загрузки csv-файла командой import_csv.
+    Обновляется в той же транзакции, что и очередная пачка строк,
+    поэтому после сбоя загрузку можно продолжить с offset.
+    """
+
+    fixture = models.CharField(
+        verbose_name='Файл',
+        max_length=255,
+        unique=True
+    )
+    digest = models.CharField(
+        verbose_name='SHA-256 файла',
+        max_length=64
+    )
+    offset = models.BigIntegerField(
+        verbose_name='Смещение в байтах',
+        default=0
+    )
+    rows = models.PositiveIntegerField(
+        verbose_name='Загружено строк',
+        default=0
+    )
+    finished = models.BooleanField(
+        verbose_name='Загружен полностью',
+        default=False
+    )
+
+    class Meta:
+        verbose_name = 'Контрольная точка импорта'
+        verbose_name_plural = 'Контрольные точки импорта'
+
+    def __str__(self):
+        return self.fixture
+
+    def advance(self, offset, rows):
+        self.offset = offset
+        self.rows += rows
+        self.save(update_fields=('offset', 'rows'))
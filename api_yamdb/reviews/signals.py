@@ -0,0 +1,107 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import models
+from django.db.models import Case, ExpressionWrapper, F, Value, When
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from reviews.models import Review, Title
+
+_state = threading.local()
+
+# Данные записаны в обход сигналов моделей (импорт из csv).
+# Приложения, кеширующие ответы, сбрасывают по нему свои кеши
+data_imported = Signal()
+
+
+@contextmanager
+def deferred_rating():
+    """
+    Внутри блока сигналы отзывов не трогают рейтинг: массовая операция
+    сама пересчитывает его один раз для затронутых произведений.
+    Вложенный блок на выходе возвращает прежнее состояние.
+    """
+
+    previous = rating_deferred()
+    _state.deferred = True
+    try:
+        yield
+    finally:
+        _state.deferred = previous
+
+
+def rating_deferred():
+    return getattr(_state, 'deferred', False)
+
+
+def change_rating(title_id, score_delta, count_delta):
+    """
+    Сдвигает сумму оценок и число отзывов произведения одним UPDATE.
+    Рейтинг считается в той же инструкции из старых значений столбцов,
+    поэтому одновременные изменения не теряются.
+    """
+
+    score_sum = F('score_sum') + score_delta
+    review_count = F('review_count') + count_delta
+    Title.objects.filter(pk=title_id).update(
+        score_sum=score_sum,
+        review_count=review_count,
+        rating=Case(
+            When(review_count__lte=-count_delta, then=Value(None)),
+            default=ExpressionWrapper(
+                score_sum / review_count,
+                output_field=models.IntegerField()
+            ),
+        )
+    )
+
+
+def contribution(score, is_hidden):
+    """
+    Вклад отзыва в (сумму оценок, число отзывов).
+    """
+
+    return (0, 0) if is_hidden else (int(score), 1)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    """
+    Учитываем новый или изменённый отзыв в рейтинге произведения.
+    """
+
+    if rating_deferred():
+        return
+    score, count = contribution(instance.score, instance.is_hidden)
+    if created:
+        if count:
+            change_rating(instance.title_id, score, count)
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    if not {'score', 'title_id', 'is_hidden'} <= set(loaded):
+        # Старая оценка неизвестна: пересчитываем честно
+        Title.objects.filter(
+            pk__in={instance.title_id, loaded.get('title_id')}
+        ).refresh_rating()
+        return
+    old_score, old_count = contribution(loaded['score'], loaded['is_hidden'])
+    if loaded['title_id'] != instance.title_id:
+        if old_count:
+            change_rating(loaded['title_id'], -old_score, -old_count)
+        if count:
+            change_rating(instance.title_id, score, count)
+    elif (old_score, old_count) != (score, count):
+        change_rating(instance.title_id, score - old_score, count - old_count)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """
+    Убираем удалённый отзыв из рейтинга произведения.
+    Срабатывает и при каскадном удалении пользователя или произведения.
+    """
+
+    if rating_deferred() or instance.is_hidden:
+        return
+    change_rating(instance.title_id, -int(instance.score), -1)
@@ -0,0 +1,30 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import (
+    JWTAuthentication,
+    JWTStatelessUserAuthentication
+)
+
+from users.tokens import ROLE_CLAIM
+
+
+class TokenClaimsAuthentication(JWTStatelessUserAuthentication):
+    """
+    Аутентификация по JWT без запроса пользователя к базе данных
+    для чтения. Для записи пользователь загружается из базы:
+    удалённый или отключённый пользователь получает 401, а не ошибку
+    внешнего ключа, и права проверяются по текущей роли.
+    Токены, выданные до появления роли в полезной нагрузке,
+    обрабатываются как раньше: пользователь загружается из базы.
+    """
+
+    stateless = False
+
+    def authenticate(self, request):
+        # Экземпляр создаётся на каждый запрос, флаг не протекает
+        self.stateless = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if ROLE_CLAIM not in validated_token or not self.stateless:
+            return JWTAuthentication.get_user(self, validated_token)
+        return super().get_user(validated_token)
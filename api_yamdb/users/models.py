@@ -34,6 +34,9 @@ class User(AbstractUser):
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ('last_name',)
+        indexes = (
+            models.Index(fields=('last_name',), name='user_last_name_idx'),
+        )
 
     def __str__(self):
         return self.username
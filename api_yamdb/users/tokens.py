@@ -0,0 +1,50 @@
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import User
+
+ROLE_CLAIM = 'role'
+
+
+class RoleAccessToken(AccessToken):
+    """
+    Токен доступа с ролью и флагами пользователя в полезной нагрузке.
+    По ним права проверяются без чтения пользователя из базы данных.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['username'] = user.username
+        token[ROLE_CLAIM] = user.role
+        token['is_staff'] = user.is_staff
+        token['is_superuser'] = user.is_superuser
+        return token
+
+
+class RoleTokenUser(TokenUser):
+    """
+    Пользователь, восстановленный из токена без запроса к базе данных.
+    Используется только для чтения. Роль берётся из токена, поэтому
+    её изменение вступает в силу только с новым токеном (не позже
+    ACCESS_TOKEN_LIFETIME). Так же до истечения токена удалённый или
+    отключённый (is_active=False) пользователь может читать данные;
+    запись проверяет пользователя по базе.
+    """
+
+    @cached_property
+    def role(self):
+        return self.token.get(ROLE_CLAIM, User.USER)
+
+    @property
+    def is_moderator(self):
+        return self.role == User.MODERATOR
+
+    @property
+    def is_admin(self):
+        return (
+            self.role == User.ADMIN
+            or self.is_superuser
+            or self.is_staff
+        )
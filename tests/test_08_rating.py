@@ -0,0 +1,66 @@
+import pytest
+
+from .common import auth_client, create_reviews
+
+
+class Test08TitleRating:
+
+    def get_title(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == 200
+        return response.json()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_follows_reviews(self, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        title_id = titles[0]['id']
+        assert self.get_title(admin_client, title_id)['rating'] == 4, (
+            'Проверьте, что `rating` произведения равен среднему по отзывам'
+        )
+        from reviews.models import Title
+        title = Title.objects.get(pk=title_id)
+        assert (title.review_count, title.score_sum) == (3, 12), (
+            'Проверьте, что `review_count` и `score_sum` обновляются при создании отзыва'
+        )
+
+        response = admin_client.patch(
+            f'/api/v1/titles/{title_id}/reviews/{reviews[0]["id"]}/',
+            data={'score': 10}
+        )
+        assert response.status_code == 200
+        assert self.get_title(admin_client, title_id)['rating'] == 5, (
+            'Проверьте, что `rating` пересчитывается при изменении оценки'
+        )
+
+        response = auth_client(user).delete(
+            f'/api/v1/titles/{title_id}/reviews/{reviews[1]["id"]}/'
+        )
+        assert response.status_code == 204
+        assert self.get_title(admin_client, title_id)['rating'] == 7, (
+            'Проверьте, что `rating` пересчитывается при удалении отзыва'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rating_on_cascade_delete(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        title_id = titles[0]['id']
+        admin_client.delete(f'/api/v1/users/{moderator.username}/')
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert self.get_title(admin_client, title_id)['rating'] == 5, (
+            'Проверьте, что `rating` пересчитывается при удалении автора отзыва'
+        )
+        admin.delete()
+        assert self.get_title(client, title_id)['rating'] is None, (
+            'Проверьте, что без отзывов `rating` равен `None`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_refresh_rating(self, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        from reviews.models import Title
+        Title.objects.update(rating=None, review_count=0, score_sum=0)
+        Title.objects.refresh_rating()
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating, title.review_count, title.score_sum) == (4, 3, 12)
+        title = Title.objects.get(pk=titles[1]['id'])
+        assert (title.rating, title.review_count, title.score_sum) == (None, 0, 0)
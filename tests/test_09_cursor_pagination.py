@@ -0,0 +1,54 @@
+import pytest
+
+from .common import create_reviews
+
+
+class Test09CursorPagination:
+
+    def walk(self, client, url):
+        pages = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в режиме курсора `count` не считается'
+            )
+            pages.append(data)
+            url = data['next']
+        return pages
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reviews_cursor(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/?cursor=&limit=2'
+        pages = self.walk(client, url)
+        assert [len(page['results']) for page in pages] == [2, 1], (
+            'Проверьте, что курсор выдаёт отзывы страницами по `limit`'
+        )
+        ids = [item['id'] for page in pages for item in page['results']]
+        assert ids == [review['id'] for review in reviews]
+        assert pages[0]['previous'] is None
+        response = client.get(pages[1]['previous'])
+        assert [item['id'] for item in response.json()['results']] == ids[:2], (
+            'Проверьте, что ссылка `previous` возвращает предыдущую страницу'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_titles_cursor(self, client, admin_client, admin):
+        create_reviews(admin_client, admin)
+        pages = self.walk(client, '/api/v1/titles/?cursor=&limit=1')
+        names = [page['results'][0]['name'] for page in pages]
+        assert names == sorted(names) and len(names) == 2, (
+            'Проверьте, что курсор по произведениям упорядочен по `name`'
+        )
+        response = client.get('/api/v1/titles/?cursor=broken')
+        assert response.status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_limit_offset_by_default(self, client, admin_client, admin):
+        create_reviews(admin_client, admin)
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 2, (
+            'Проверьте, что без параметра `cursor` пагинация не изменилась'
+        )
@@ -0,0 +1,57 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_categories, create_genre
+
+
+class Test10ListCache:
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('url, create', (
+        ('/api/v1/categories/', create_categories),
+        ('/api/v1/genres/', create_genre),
+    ))
+    def test_01_list_cached_until_write(self, client, admin_client, url, create):
+        created = create(admin_client)
+        response = client.get(url)
+        assert response.json()['count'] == len(created)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assert response.json()['count'] == len(created)
+        assert len(queries) == 0, (
+            f'Проверьте, что повторный GET запрос `{url}` берётся из кеша без запросов к БД'
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url, {'search': created[0]['name']})
+        assert len(queries) > 0, (
+            f'Проверьте, что кеш `{url}` учитывает строку запроса'
+        )
+
+        admin_client.delete(f'{url}{created[0]["slug"]}/')
+        response = client.get(url)
+        assert response.json()['count'] == len(created) - 1, (
+            f'Проверьте, что удаление сбрасывает кеш `{url}`'
+        )
+        admin_client.post(url, data={'name': 'Новое', 'slug': 'new'})
+        response = client.get(url)
+        assert response.json()['count'] == len(created), (
+            f'Проверьте, что создание сбрасывает кеш `{url}`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_version_bumped_after_commit(self, admin_client):
+        from django.db import transaction
+
+        from api.v1.cache import get_version
+        from reviews.models import Genre
+        create_genre(admin_client)
+        version = get_version(Genre)
+        with transaction.atomic():
+            Genre.objects.first().delete()
+            assert get_version(Genre) == version, (
+                'Проверьте, что версия не меняется до фиксации транзакции: '
+                'иначе старые данные закешируются под новой версией'
+            )
+        assert get_version(Genre) != version
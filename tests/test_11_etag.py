@@ -0,0 +1,84 @@
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_reviews
+
+
+class Test11ETag:
+
+    def assert_not_modified(self, client, url):
+        response = client.get(url)
+        etag = response['ETag']
+        assert response.status_code == 200 and etag, (
+            f'Проверьте, что GET запрос `{url}` возвращает заголовок ETag'
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            f'Проверьте, что GET запрос `{url}` с совпадающим If-None-Match возвращает 304'
+        )
+        assert len(queries) == 0, (
+            f'Проверьте, что ответ 304 на `{url}` не обращается к БД'
+        )
+        return etag
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_etag(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        for url in ('/api/v1/titles/', f'/api/v1/titles/{titles[0]["id"]}/'):
+            etag = self.assert_not_modified(client, url)
+            admin_client.patch(
+                f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/',
+                data={'score': 10}
+            )
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 200, (
+                f'Проверьте, что изменение отзыва меняет ETag `{url}`'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_and_comments_etag(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = self.assert_not_modified(client, reviews_url)
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        self.assert_not_modified(client, comments_url)
+        admin_client.post(comments_url, data={'text': 'qwerty'})
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        admin_client.delete(f'{reviews_url}{reviews[0]["id"]}/')
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что удаление отзыва меняет ETag списка отзывов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_wildcard_does_not_hide_404(self, client, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        for url in (
+            '/api/v1/titles/999999/',
+            '/api/v1/titles/999999/reviews/',
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/999999/comments/',
+        ):
+            response = client.get(url, HTTP_IF_NONE_MATCH='*')
+            assert response.status_code == 404, (
+                f'Проверьте, что `If-None-Match: *` на `{url}` '
+                'не скрывает 404'
+            )
+
+    def test_04_shared_cache_check(self):
+        from api.checks import shared_cache_check
+        assert [
+            warning.id for warning in shared_cache_check(None)
+        ] == ['api.W001'], (
+            'Проверьте, что check --deploy предупреждает о кеше в памяти '
+            'процесса'
+        )
+        shared = {'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': '/tmp/api_yamdb_cache',
+        }}
+        with override_settings(CACHES=shared):
+            assert shared_cache_check(None) == []
@@ -0,0 +1,101 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .common import create_titles
+
+
+def claims_client(user):
+    from users.tokens import RoleAccessToken
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(user)}'
+    )
+    return client
+
+
+class Test12TokenClaims:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_token_has_role(self, client, user):
+        from django.contrib.auth.tokens import default_token_generator
+        response = client.post('/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user)
+        })
+        assert response.status_code == 200
+        from rest_framework_simplejwt.tokens import AccessToken
+        token = AccessToken(response.json()['token'])
+        assert token['role'] == user.role, (
+            'Проверьте, что токен содержит роль пользователя'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_permissions_without_user_query(self, admin, user):
+        admin_client = claims_client(admin)
+        response = admin_client.post(
+            '/api/v1/genres/', data={'name': 'Драма', 'slug': 'drama'}
+        )
+        assert response.status_code == 201, (
+            'Проверьте, что администратор с токеном из `/auth/token/` может создавать жанры'
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.get('/api/v1/genres/')
+        assert response.status_code == 200
+        user_table = connection.ops.quote_name('users_user')
+        assert not any(user_table in query['sql'] for query in queries), (
+            'Проверьте, что при чтении пользователь берётся из токена без запроса к БД'
+        )
+        response = claims_client(user).post(
+            '/api/v1/genres/', data={'name': 'Ужасы', 'slug': 'horror'}
+        )
+        assert response.status_code == 403
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_me_and_authoring(self, admin_client, user):
+        client = claims_client(user)
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == 200
+        assert response.json()['username'] == user.username
+        response = client.patch('/api/v1/users/me/', data={'bio': 'new bio'})
+        assert response.status_code == 200
+        assert response.json()['bio'] == 'new bio'
+
+        admin_client.post('/api/v1/categories/', data={'name': 'Фильм', 'slug': 'films'})
+        admin_client.post('/api/v1/genres/', data={'name': 'Драма', 'slug': 'drama'})
+        title = admin_client.post('/api/v1/titles/', data={
+            'name': 'Проект', 'year': 2020, 'genre': ['drama'], 'category': 'films'
+        }).json()
+        url = f'/api/v1/titles/{title["id"]}/reviews/'
+        response = client.post(url, data={'text': 'qwerty', 'score': 5})
+        assert response.status_code == 201
+        assert response.json()['author'] == user.username
+        review_url = f'{url}{response.json()["id"]}/'
+        response = client.patch(review_url, data={'text': 'changed'})
+        assert response.status_code == 200, (
+            'Проверьте, что автор с токеном из `/auth/token/` может изменять свой отзыв'
+        )
+        response = client.post(url, data={'text': 'qwerty', 'score': 5})
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_deleted_and_inactive_users(self, admin_client, user, admin):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        client = claims_client(user)
+        user.is_active = False
+        user.save()
+        response = client.post(url, data={'text': 'qwerty', 'score': 5})
+        assert response.status_code == 401, (
+            'Проверьте, что отключённый пользователь не может писать '
+            'по ещё действующему токену'
+        )
+        user.delete()
+        response = client.post(url, data={'text': 'qwerty', 'score': 5})
+        assert response.status_code == 401, (
+            'Проверьте, что токен удалённого пользователя при записи '
+            'даёт 401, а не ошибку сервера'
+        )
+        response = client.get(url)
+        assert response.status_code == 200
@@ -0,0 +1,53 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_comments
+
+
+class Test13QueryCount:
+
+    def count_queries(self, client, url, limit):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, {'limit': limit})
+        assert response.status_code == 200
+        assert len(response.json()['results']) == limit
+        return len(queries)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reviews_fixed_queries(self, client, admin_client, admin):
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        assert self.count_queries(client, url, 1) == self.count_queries(client, url, 3), (
+            f'Проверьте, что число запросов к БД для `{url}` не зависит от размера страницы'
+        )
+        url = f'{url}{reviews[0]["id"]}/comments/'
+        assert self.count_queries(client, url, 1) == self.count_queries(client, url, 3), (
+            f'Проверьте, что число запросов к БД для `{url}` не зависит от размера страницы'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_nested_parent_resolved_once(self, client, admin_client, admin):
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url)
+        assert len(queries) == 2, (
+            f'Проверьте, что список `{url}` выполняет только подсчёт и выборку страницы'
+        )
+        url = f'{url}{reviews[0]["id"]}/comments/'
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url, {'cursor': ''})
+        assert len(queries) == 1, (
+            f'Проверьте, что курсорный список `{url}` выполняет один запрос'
+        )
+        for url in (
+            '/api/v1/titles/0/reviews/',
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/{reviews[0]["id"]}/comments/',
+        ):
+            response = client.get(url)
+            assert response.status_code == 404, (
+                f'Проверьте, что `{url}` для несуществующего родителя возвращает 404'
+            )
+        response = client.get(f'/api/v1/titles/{titles[1]["id"]}/reviews/')
+        assert response.status_code == 200 and response.json()['results'] == []
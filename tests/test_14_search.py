@@ -0,0 +1,114 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_reviews, create_titles
+
+
+class Test14TitleSearch:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_search(self, client, admin_client):
+        titles, _, genres = create_titles(admin_client)
+        response = client.get('/api/v1/titles/', {'search': 'поворот'})
+        assert response.status_code == 200
+        names = [title['name'] for title in response.json()['results']]
+        assert names == [titles[0]['name']], (
+            'Проверьте, что поиск `search` не зависит от регистра кириллицы'
+        )
+        response = client.get('/api/v1/titles/', {'search': 'драм'})
+        names = [title['name'] for title in response.json()['results']]
+        assert names == [titles[1]['name']], (
+            'Проверьте, что поиск `search` идёт по описанию и по префиксу слова'
+        )
+        response = client.get(
+            '/api/v1/titles/', {'search': 'драма', 'genre': genres[0]['slug']}
+        )
+        assert response.json()['count'] == 0, (
+            'Проверьте, что поиск `search` сочетается с остальными фильтрами'
+        )
+        response = client.get('/api/v1/titles/', {'search': '"AND ('})
+        assert response.status_code == 200
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_search_index_follows_writes(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/', data={'name': 'Побег из Шоушенка'}
+        )
+        response = client.get('/api/v1/titles/', {'search': 'ШОУШЕНКА'})
+        assert response.json()['count'] == 1
+        response = client.get('/api/v1/titles/', {'search': 'поворот'})
+        assert response.json()['count'] == 0
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        response = client.get('/api/v1/titles/', {'search': 'побег'})
+        assert response.json()['count'] == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_review_search(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = client.get(url, {'search': 'QWERTY123'})
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert [review['id'] for review in results] == [reviews[1]['id']], (
+            f'Проверьте, что `{url}` ищет отзывы по параметру `search`'
+        )
+        assert results[0]['snippet'] == '<mark>qwerty123</mark>', (
+            'Проверьте, что найденный отзыв содержит фрагмент с подсветкой'
+        )
+        assert isinstance(results[0]['rank'], float)
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url, {'search': 'QWERTY123'})
+        assert all(
+            query['sql'].count('MATCH') <= 1 for query in queries
+        ), 'Проверьте, что rank и snippet читаются из одного MATCH'
+
+        response = client.get('/api/v1/reviews/', {'search': 'qwerty'})
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert {review['id'] for review in results} == {review['id'] for review in reviews}, (
+            'Проверьте, что `/api/v1/reviews/` ищет отзывы по всем произведениям'
+        )
+        assert all(review['title'] == titles[0]['id'] for review in results)
+        response = client.get('/api/v1/reviews/')
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_search_joins_fts_once(self, client, admin_client):
+        create_titles(admin_client)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/v1/titles/', {'search': 'драма'})
+        assert response.status_code == 200
+        assert response.json()['count'] == 1
+        selects = [
+            query['sql'] for query in queries
+            if 'reviews_title_fts' in query['sql']
+        ]
+        assert selects and all(
+            sql.count('MATCH') == 1 for sql in selects
+        ), 'Проверьте, что поиск выполняет MATCH один раз на запрос'
+
+        response = client.get('/api/v1/titles/facets/', {'search': 'драма'})
+        assert response.status_code == 200, (
+            'Проверьте, что фасеты считаются с учётом поиска `search`'
+        )
+        assert response.json()['year'] == [{'year': 2020, 'count': 1}]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_search_returns_every_match(self, client, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        ids = set()
+        for number in range(3):
+            response = admin_client.post('/api/v1/titles/', data={
+                'name': f'Сиквел {number}', 'year': 2001 + number,
+                'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'],
+                'description': 'Продолжение истории'
+            })
+            ids.add(response.json()['id'])
+        response = client.get('/api/v1/titles/', {'search': 'продолжение'})
+        assert response.json()['count'] == 3
+        assert {
+            title['id'] for title in response.json()['results']
+        } == ids, 'Проверьте, что поиск `search` находит все совпадения'
@@ -0,0 +1,112 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_comments
+
+# Полный просмотр таблицы или всего индекса: «SCAN reviews_title»,
+# «SCAN TABLE reviews_title», «SCAN reviews_title USING COVERING INDEX x».
+# Поиск по индексу с условием идёт строкой SEARCH ... (col=?)
+FULL_SCAN_RE = re.compile(
+    r'^SCAN (TABLE )?(?P<table>\w+)( AS \w+)?'
+    r'( USING (COVERING )?INDEX \w+)?$'
+)
+
+
+def full_scans(sql):
+    tables = set(connection.introspection.table_names())
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        details = [row[-1] for row in cursor.fetchall()]
+    # Индекс, отдающий строки в порядке ORDER BY, при LIMIT и без
+    # фильтра читается только до конца страницы
+    bounded = ' LIMIT ' in sql and ' WHERE ' not in sql and not any(
+        detail.startswith('USE TEMP B-TREE FOR') for detail in details
+    )
+    scans = []
+    for detail in details:
+        match = FULL_SCAN_RE.match(detail)
+        if bounded and ' INDEX ' in detail:
+            continue
+        # Просмотр материализованного подзапроса (COUNT по subquery) не в счёт
+        if match and match.group('table') in tables:
+            scans.append(match.group('table'))
+    return scans
+
+
+# Полный просмотр, который ожидается по построению
+EXPECTED_SCANS = {
+    # Выгрузка читает таблицу целиком
+    '/api/v1/titles/export/': {'reviews_title'},
+    '/api/v1/export/comments/': {'reviews_comment'},
+    # COUNT(*) для LimitOffsetPagination по всему списку без фильтров;
+    # для больших списков есть ?cursor= без подсчёта
+    '/api/v1/titles/': {'reviews_title'},
+    '/api/v1/categories/': {'reviews_category'},
+    '/api/v1/genres/': {'reviews_genre'},
+    '/api/v1/users/': {'users_user'},
+    # Подстрока LIKE '%x%' индексом не ускоряется. Справочники категорий
+    # и жанров малы, а для поиска произведений по словам есть ?search=
+    # с индексом FTS5
+    '/api/v1/titles/?name=x': {'reviews_title'},
+    '/api/v1/categories/?search=x': {'reviews_category'},
+    '/api/v1/genres/?search=x': {'reviews_genre'},
+}
+
+
+class Test15QueryPlans:
+
+    @pytest.mark.skipif(
+        connection.vendor != 'sqlite',
+        reason='План запроса проверяется в формате SQLite'
+    )
+    @pytest.mark.django_db(transaction=True)
+    def test_01_no_full_scans(self, admin_client, admin):
+        comments, reviews, titles, user, _ = create_comments(admin_client, admin)
+        title_id = titles[0]['id']
+        review_id = reviews[0]['id']
+        urls = (
+            '/api/v1/titles/',
+            '/api/v1/titles/?cursor=',
+            '/api/v1/titles/?genre=horror',
+            '/api/v1/titles/?category=films',
+            '/api/v1/titles/?year=2000',
+            '/api/v1/titles/?name=x',
+            '/api/v1/titles/?search=поворот',
+            '/api/v1/titles/facets/?genre=horror',
+            f'/api/v1/titles/{title_id}/',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/?cursor=',
+            f'/api/v1/titles/{title_id}/reviews/?search=qwerty',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/?cursor=',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/{comments[0]["id"]}/',
+            '/api/v1/reviews/?search=qwerty',
+            '/api/v1/categories/',
+            '/api/v1/categories/?search=x',
+            '/api/v1/genres/',
+            '/api/v1/genres/?search=x',
+            '/api/v1/users/',
+            f'/api/v1/users/{user.username}/',
+            '/api/v1/users/me/',
+            '/api/v1/titles/export/',
+            '/api/v1/export/reviews/?since=2020-01-01T00:00:00Z',
+            '/api/v1/export/comments/',
+        )
+        for url in urls:
+            with CaptureQueriesContext(connection) as queries:
+                response = admin_client.get(url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            assert response.status_code == 200, url
+            for query in queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                scans = set(full_scans(query['sql'])) - EXPECTED_SCANS.get(url, set())
+                assert not scans, (
+                    f'Проверьте индексы: запрос `{url}` читает всю таблицу '
+                    f'({", ".join(scans)}):\n{query["sql"]}'
+                )
@@ -0,0 +1,58 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_titles
+
+
+class Test16TitleFacets:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_facets(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/v1/titles/facets/')
+        assert response.status_code == 200, (
+            'Страница `/api/v1/titles/facets/` не найдена, проверьте этот адрес в *urls.py*'
+        )
+        assert len(queries) == 3, (
+            'Проверьте, что срезы считаются тремя запросами с группировкой'
+        )
+        data = response.json()
+        assert {item['slug']: item['count'] for item in data['genre']} == {
+            genre['slug']: 1 for genre in genres
+        }
+        assert {item['slug']: item['count'] for item in data['category']} == {
+            category['slug']: 1 for category in categories
+        }
+        assert data['year'] == [{'year': 2000, 'count': 1}, {'year': 2020, 'count': 1}]
+
+        response = client.get('/api/v1/titles/facets/', {'genre': genres[0]['slug']})
+        data = response.json()
+        assert len(data['genre']) == 3, (
+            'Проверьте, что срез по жанрам не учитывает собственный фильтр `genre`'
+        )
+        assert data['category'] == [
+            {'name': categories[0]['name'], 'slug': categories[0]['slug'], 'count': 1}
+        ], (
+            'Проверьте, что срез по категориям учитывает фильтр `genre`'
+        )
+        assert data['year'] == [{'year': 2000, 'count': 1}]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_facets_cached(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/facets/'
+        response = client.get(url)
+        etag = response['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url)
+        assert len(queries) == 0, (
+            'Проверьте, что повторный запрос срезов берётся из кеша'
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        admin_client.patch(f'/api/v1/titles/{titles[0]["id"]}/', data={'year': 2001})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert {'year': 2001, 'count': 1} in response.json()['year']
@@ -0,0 +1,35 @@
+import pytest
+from django.test import override_settings
+
+from .common import create_reviews
+
+
+class Test17FastTitleSerializer:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_same_shape(self, client, admin_client, admin):
+        create_reviews(admin_client, admin)
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Без категории', 'year': 2001, 'genre': ['drama'],
+            'category': 'books'
+        })
+        admin_client.delete('/api/v1/categories/books/')
+        for params in ({}, {'genre': 'comedy'}, {'cursor': ''}):
+            fast = client.get('/api/v1/titles/', params).json()
+            with override_settings(TITLE_FAST_SERIALIZER=False):
+                regular = client.get('/api/v1/titles/', params).json()
+            assert fast == regular, (
+                'Проверьте, что быстрый сериализатор отдаёт тот же JSON, '
+                'что и TitleReadSerializer'
+            )
+
+    @pytest.mark.django_db
+    def test_02_benchmark_command(self):
+        from io import StringIO
+        from django.core.management import call_command
+        out, err = StringIO(), StringIO()
+        call_command(
+            'bench_title_serializers', titles=20, repeat=1, stdout=out, stderr=err
+        )
+        assert 'на 1000' in out.getvalue()
+        assert not err.getvalue()
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from .common import create_comments, create_reviews
+
+
+def read_stream(response):
+    return b''.join(response.streaming_content).decode('utf-8')
+
+
+class Test18Export:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_export(self, client, user_client, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        url = '/api/v1/titles/export/'
+        assert client.get(url).status_code == 401
+        assert user_client.get(url).status_code == 403, (
+            f'Проверьте, что `{url}` доступен только администратору'
+        )
+        response = admin_client.get(url)
+        assert response.status_code == 200
+        assert response.streaming, (
+            f'Проверьте, что `{url}` отдаёт потоковый ответ'
+        )
+        data = json.loads(read_stream(response))
+        assert [title['id'] for title in data] == sorted(title['id'] for title in titles)
+        assert data[0]['rating'] == 4
+        assert data[0]['category'] == {'name': 'Фильм', 'slug': 'films'}
+        assert [genre['slug'] for genre in data[0]['genre']] == ['comedy', 'horror']
+
+        response = admin_client.get(url, {'output': 'ndjson', 'year': 2020})
+        assert response['Content-Type'] == 'application/x-ndjson'
+        lines = read_stream(response).splitlines()
+        assert [json.loads(line)['id'] for line in lines] == [titles[1]['id']], (
+            f'Проверьте, что `{url}?output=ndjson` учитывает фильтры'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_titles_export_chunks(self, admin_client, admin):
+        create_reviews(admin_client, admin)
+        from api.v1.export import iter_titles
+        from reviews.models import Title
+        assert len(list(iter_titles(Title.objects.all(), chunk_size=1))) == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_reviews_and_comments_export(self, user_client, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = '/api/v1/export/reviews/'
+        assert user_client.get(url).status_code == 403, (
+            f'Проверьте, что `{url}` доступен только администратору'
+        )
+        response = admin_client.get(url)
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/x-ndjson'
+        rows = [json.loads(line) for line in read_stream(response).splitlines()]
+        assert [row['id'] for row in rows] == [review['id'] for review in reviews]
+        assert [row['author'] for row in rows] == [review['author'] for review in reviews]
+        assert all(row['title'] == titles[0]['id'] for row in rows)
+
+        response = admin_client.get(url, {'after': rows[0]['cursor']})
+        resumed = [json.loads(line) for line in read_stream(response).splitlines()]
+        assert [row['id'] for row in resumed] == [row['id'] for row in rows[1:]], (
+            f'Проверьте, что `{url}?after=` продолжает выгрузку после курсора'
+        )
+        response = admin_client.get(url, {'since': rows[-1]['pub_date']})
+        assert [json.loads(line)['id'] for line in read_stream(response).splitlines()] == [rows[-1]['id']]
+        response = admin_client.get(url, {'until': rows[0]['pub_date']})
+        assert read_stream(response) == ''
+        assert admin_client.get(url, {'after': 'broken'}).status_code == 400
+        assert admin_client.get(url, {'since': 'yesterday'}).status_code == 400
+
+        response = admin_client.get('/api/v1/export/comments/')
+        rows = [json.loads(line) for line in read_stream(response).splitlines()]
+        assert [row['id'] for row in rows] == [comment['id'] for comment in comments]
+        assert all(
+            row['review'] == reviews[0]['id'] and row['title'] == titles[0]['id']
+            for row in rows
+        )
@@ -0,0 +1,104 @@
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_comments
+
+
+class Test19SparseFields:
+
+    def get(self, client, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, params)
+        assert response.status_code == 200, (
+            f'Проверьте, что `{url}` с параметром `fields` возвращает 200'
+        )
+        return response.json(), [query['sql'] for query in queries]
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('fast', (True, False))
+    def test_01_titles_fields(self, client, admin_client, admin, fast):
+        create_comments(admin_client, admin)
+        with override_settings(TITLE_FAST_SERIALIZER=fast):
+            data, queries = self.get(
+                client, '/api/v1/titles/', {'fields': 'id,name'}
+            )
+            full, _ = self.get(client, '/api/v1/titles/', {})
+        assert data['results'], 'Проверьте, что список произведений не пуст'
+        assert all(
+            set(item) == {'id', 'name'} for item in data['results']
+        ), 'Проверьте, что `fields` оставляет в ответе только указанные поля'
+        assert [
+            {'id': item['id'], 'name': item['name']}
+            for item in full['results']
+        ] == data['results']
+        assert not any('reviews_genre' in sql for sql in queries), (
+            'Проверьте, что без поля `genre` жанры не запрашиваются'
+        )
+        assert not any('reviews_category' in sql for sql in queries), (
+            'Проверьте, что без поля `category` категория не подгружается'
+        )
+        assert not any('description' in sql for sql in queries), (
+            'Проверьте, что неуказанные столбцы не читаются из БД'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_nested_fields(self, client, admin_client, admin):
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data, queries = self.get(client, url, {'fields': 'id,score'})
+        assert all(
+            set(item) == {'id', 'score'} for item in data['results']
+        ), 'Проверьте, что `fields` работает для отзывов'
+        assert not any('users_user' in sql for sql in queries), (
+            'Проверьте, что без поля `author` автор не подгружается'
+        )
+        data, _ = self.get(client, url, {'fields': 'author', 'cursor': ''})
+        assert all(
+            set(item) == {'author'} for item in data['results']
+        ) and data['results'][0]['author']
+        data, _ = self.get(
+            client, f'{url}{reviews[0]["id"]}/', {'fields': 'text'}
+        )
+        assert data == {'text': reviews[0]['text']}
+        data, _ = self.get(
+            client, f'{url}{reviews[0]["id"]}/comments/', {'fields': 'id'}
+        )
+        assert all(set(item) == {'id'} for item in data['results'])
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_unknown_field(self, client, admin_client, admin):
+        _, _, titles, _, _ = create_comments(admin_client, admin)
+        for url in (
+            '/api/v1/titles/',
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            '/api/v1/categories/',
+        ):
+            response = client.get(url, {'fields': 'id,password'})
+            assert response.status_code == 400, (
+                f'Проверьте, что `{url}` с неизвестным полем в `fields` '
+                'возвращает 400'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_fast_plan_cache_is_bounded(self, client, admin_client, admin):
+        from api.v1.serializers import TitleFastReadSerializer
+        create_comments(admin_client, admin)
+        build_plan = TitleFastReadSerializer.build_plan
+        self.get(client, '/api/v1/titles/', {'fields': 'id'})
+        size = build_plan.cache_info().currsize
+        for count in range(2, 30):
+            data, _ = self.get(
+                client, '/api/v1/titles/', {'fields': ','.join(['id'] * count)}
+            )
+            self.get(client, '/api/v1/titles/', {'fields': 'name,id'})
+            self.get(client, '/api/v1/titles/', {'fields': 'id,name'})
+        assert set(data['results'][0]) == {'id'}
+        assert build_plan.cache_info().currsize <= size + 1, (
+            'Проверьте, что повторы и порядок полей в `fields` '
+            'не создают новых планов сериализации'
+        )
+        assert build_plan.cache_info().maxsize == 2 ** len(
+            TitleFastReadSerializer.fields
+        )
@@ -0,0 +1,71 @@
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_comments
+
+
+class Test20ExpandReviews:
+
+    def get(self, client, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, params)
+        assert response.status_code == 200, (
+            f'Проверьте, что `{url}` с параметром `expand` возвращает 200'
+        )
+        return response.json(), len(queries)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_expand_reviews(self, client, admin_client, admin):
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        plain, plain_queries = self.get(client, url, {})
+        with override_settings(TITLE_EXPANDED_REVIEWS=2):
+            data, queries = self.get(client, url, {'expand': 'reviews'})
+        assert 'reviews' not in plain, (
+            'Проверьте, что без `expand` отзывы в карточку не встраиваются'
+        )
+        assert [review['id'] for review in data.pop('reviews')] == [
+            reviews[2]['id'], reviews[1]['id']
+        ], 'Проверьте, что `expand=reviews` отдаёт N последних отзывов'
+        assert data == plain
+        assert queries == plain_queries + 1, (
+            'Проверьте, что отзывы с авторами и числом комментариев '
+            'читаются одним запросом'
+        )
+        data, _ = self.get(client, url, {'expand': 'reviews'})
+        review = data['reviews'][-1]
+        assert review == {
+            'id': reviews[0]['id'],
+            'text': reviews[0]['text'],
+            'author': reviews[0]['author'],
+            'score': reviews[0]['score'],
+            'pub_date': review['pub_date'],
+            'comment_count': 3,
+        }, 'Проверьте поля отзыва и `comment_count` во вложенном списке'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_expand_etag_and_errors(self, client, admin_client, admin):
+        _, reviews, titles, user, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        response = client.get(url, {'expand': 'reviews'})
+        etag = response['ETag']
+        admin_client.post(
+            f'{url}reviews/{reviews[1]["id"]}/comments/', data={'text': 'x'}
+        )
+        response = client.get(
+            url, {'expand': 'reviews'}, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что новый комментарий меняет ETag карточки '
+            'с `expand=reviews`'
+        )
+        response = client.get(url, {'expand': 'comments'})
+        assert response.status_code == 400, (
+            'Проверьте, что неизвестное значение `expand` возвращает 400'
+        )
+        data, _ = self.get(
+            client, url, {'expand': 'reviews', 'fields': 'id,reviews'}
+        )
+        assert set(data) == {'id', 'reviews'}
@@ -0,0 +1,88 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_categories, create_genre
+
+
+class Test21BulkTitles:
+
+    def items(self, count, genres, category):
+        return [
+            {
+                'name': f'Произведение {number}',
+                'year': 2000 + number,
+                'genre': genres,
+                'category': category,
+            }
+            for number in range(count)
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_bulk_create(self, admin_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        slugs = [genres[0]['slug'], genres[1]['slug']]
+        data = self.items(3, slugs, categories[0]['slug'])
+        with CaptureQueriesContext(connection) as small:
+            response = admin_client.post(
+                '/api/v1/titles/', data=data, format='json'
+            )
+        assert response.status_code == 201, (
+            'Проверьте, что POST списка на `/api/v1/titles/` '
+            'создаёт произведения и возвращает 201'
+        )
+        created = response.json()
+        assert [item['name'] for item in created] == [
+            item['name'] for item in data
+        ], 'Проверьте, что ответ содержит созданные произведения по порядку'
+        assert sorted(created[0]['genre']) == sorted(slugs)
+        for item in created:
+            response = admin_client.get(f'/api/v1/titles/{item["id"]}/')
+            assert response.status_code == 200
+            assert response.json()['category'] == categories[0]
+            assert len(response.json()['genre']) == 2
+
+        data = self.items(12, slugs, categories[1]['slug'])
+        with CaptureQueriesContext(connection) as large:
+            response = admin_client.post(
+                '/api/v1/titles/', data=data, format='json'
+            )
+        assert response.status_code == 201
+        assert len(large) == len(small), (
+            'Проверьте, что число запросов массового создания '
+            'не зависит от числа произведений'
+        )
+        response = admin_client.get('/api/v1/titles/')
+        assert response.json()['count'] == 15, (
+            'Проверьте, что список произведений видит массово созданные'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_bulk_errors(self, admin_client, user_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        data = self.items(3, [genres[0]['slug']], categories[0]['slug'])
+        data[1]['genre'] = ['unknown']
+        data[2]['category'] = 'unknown'
+        del data[2]['year']
+        response = admin_client.post(
+            '/api/v1/titles/', data=data, format='json'
+        )
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {} and set(errors[1]) == {'genre'}, (
+            'Проверьте, что ошибки возвращаются по каждому элементу списка'
+        )
+        assert set(errors[2]) == {'category', 'year'}
+        assert admin_client.get('/api/v1/titles/').json()['count'] == 0, (
+            'Проверьте, что при ошибке не создаётся ни одно произведение'
+        )
+        response = admin_client.post('/api/v1/titles/', data=[], format='json')
+        assert response.status_code == 400
+        response = user_client.post(
+            '/api/v1/titles/', data=self.items(1, [], 'x'), format='json'
+        )
+        assert response.status_code == 403, (
+            'Проверьте, что массовое создание доступно только администратору'
+        )
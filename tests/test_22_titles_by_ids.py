@@ -0,0 +1,47 @@
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_titles
+
+
+class Test22TitlesByIds:
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('fast', (True, False))
+    def test_01_titles_by_ids(self, client, admin_client, fast):
+        titles, _, _ = create_titles(admin_client)
+        ids = [titles[1]['id'], titles[0]['id']]
+        with override_settings(TITLE_FAST_SERIALIZER=fast):
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(
+                    '/api/v1/titles/', {'ids': f'{ids[0]},{ids[1]},{ids[0]}'}
+                )
+        assert response.status_code == 200
+        assert len(queries) == 2, (
+            'Проверьте, что `?ids=` читает произведения с категориями '
+            'и жанры двумя запросами без COUNT(*)'
+        )
+        data = response.json()
+        assert [title['id'] for title in data] == ids, (
+            'Проверьте, что `?ids=` возвращает произведения '
+            'в порядке из запроса'
+        )
+        assert data[1] == client.get(f'/api/v1/titles/{ids[1]}/').json(), (
+            'Проверьте, что `?ids=` отдаёт те же поля, что и карточка'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_ids_validation(self, client, admin_client):
+        create_titles(admin_client)
+        too_many = ','.join(str(pk) for pk in range(settings.TITLE_IDS_MAX + 1))
+        for value in (too_many, '1,x'):
+            response = client.get('/api/v1/titles/', {'ids': value})
+            assert response.status_code == 400, (
+                'Проверьте, что слишком длинный или некорректный `ids` '
+                'возвращает 400'
+            )
+        response = client.get('/api/v1/titles/', {'ids': '0'})
+        assert response.status_code == 200 and response.json() == []
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+from django.conf import settings
+
+from .common import auth_client, create_reviews
+
+
+class Test23Batch:
+
+    url = '/api/v1/batch/'
+
+    def batch(self, client, requests):
+        response = client.post(
+            self.url, data=json.dumps({'requests': requests}),
+            content_type='application/json'
+        )
+        assert response.status_code == 200, (
+            f'Проверьте, что POST на `{self.url}` возвращает 200'
+        )
+        return response.json()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_batch_reads_and_writes(self, client, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        title_url = f'/api/v1/titles/{titles[1]["id"]}/'
+        results = self.batch(auth_client(user), [
+            {'method': 'GET', 'path': title_url},
+            {'method': 'GET', 'path': '/api/v1/titles/?limit=1'},
+            {'method': 'GET', 'path': '/api/v1/unknown/'},
+            {
+                'method': 'POST',
+                'path': f'{title_url}reviews/',
+                'body': {'text': 'Из пакета', 'score': 8},
+            },
+            {'method': 'GET', 'path': title_url},
+            {'method': 'GET', 'path': '/api/v1/users/me/'},
+        ])
+        assert [result['status'] for result in results] == [
+            200, 200, 404, 201, 200, 200
+        ], 'Проверьте статусы вложенных запросов пакета'
+        assert results[4]['body'] == client.get(title_url).json(), (
+            'Проверьте, что элемент пакета отдаёт то же тело, что и запрос'
+        )
+        assert results[0]['body']['rating'] is None
+        assert len(results[1]['body']['results']) == 1
+        assert results[3]['body']['author'] == user.username, (
+            'Проверьте, что вложенные запросы выполняются '
+            'с авторизацией вызывающего'
+        )
+        assert results[4]['body']['rating'] == 8, (
+            'Проверьте, что чтение после записи в пакете видит её результат'
+        )
+        assert results[5]['body']['username'] == user.username
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_batch_permissions_and_validation(
+        self, client, admin_client, admin
+    ):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        results = self.batch(client, [
+            {
+                'method': 'POST',
+                'path': f'/api/v1/titles/{titles[1]["id"]}/reviews/',
+                'body': {'text': 'Аноним', 'score': 1},
+            },
+            {'method': 'GET', 'path': '/api/v1/users/'},
+            {'method': 'POST', 'path': self.url, 'body': {'requests': []}},
+        ])
+        assert [result['status'] for result in results] == [401, 401, 400], (
+            'Проверьте, что права проверяются для каждого вложенного запроса'
+        )
+        for requests in (
+            [],
+            [{'method': 'GET', 'path': '/admin/'}],
+            [{'method': 'TRACE', 'path': '/api/v1/titles/'}],
+            [{'method': 'GET', 'path': '/api/v1/titles/'}] * (
+                settings.BATCH_MAX_REQUESTS + 1
+            ),
+        ):
+            response = client.post(
+                self.url, data=json.dumps({'requests': requests}),
+                content_type='application/json'
+            )
+            assert response.status_code == 400, (
+                'Проверьте, что некорректный пакет возвращает 400'
+            )
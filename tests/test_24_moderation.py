@@ -0,0 +1,147 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client, create_comments
+
+
+class Test24Moderation:
+
+    reviews_url = '/api/v1/moderation/reviews/'
+    comments_url = '/api/v1/moderation/comments/'
+
+    def rating(self, client, title_id):
+        return client.get(f'/api/v1/titles/{title_id}/').json()['rating']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_hide_and_show_reviews(self, client, admin_client, admin):
+        comments, reviews, titles, _, moderator = create_comments(
+            admin_client, admin
+        )
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        moderator_client = auth_client(moderator)
+        response = moderator_client.post(self.reviews_url, data={
+            'action': 'hide', 'ids': [reviews[0]['id'], reviews[1]['id']]
+        }, format='json')
+        assert response.status_code == 200, (
+            f'Проверьте, что модератор может выполнить POST на '
+            f'`{self.reviews_url}`'
+        )
+        assert response.json() == {'count': 2}
+        assert self.rating(client, titles[0]['id']) == 4, (
+            'Проверьте, что скрытые отзывы не учитываются в рейтинге'
+        )
+        response = client.get(f'{title_url}reviews/')
+        assert [item['id'] for item in response.json()['results']] == [
+            reviews[2]['id']
+        ], 'Проверьте, что скрытые отзывы не попадают в список'
+        review_url = f'{title_url}reviews/{reviews[0]["id"]}/'
+        assert client.get(review_url).status_code == 404
+        assert client.get(f'{review_url}comments/').status_code == 404, (
+            'Проверьте, что комментарии скрытого отзыва недоступны'
+        )
+
+        response = moderator_client.post(self.reviews_url, data={
+            'action': 'show', 'author': admin.username
+        }, format='json')
+        assert response.json() == {'count': 1}
+        assert self.rating(client, titles[0]['id']) == 4
+        response = client.get(f'{review_url}comments/')
+        assert response.json()['count'] == len(comments)
+
+        response = admin_client.patch(
+            f'{title_url}reviews/{reviews[2]["id"]}/', data={'score': 10}
+        )
+        assert response.status_code == 200
+        assert self.rating(client, titles[0]['id']) == 7, (
+            'Проверьте, что после модерации рейтинг меняется как обычно'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_delete_by_filter(self, client, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(
+            admin_client, admin
+        )
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        response = auth_client(user).post(self.reviews_url, data={
+            'action': 'delete', 'author': user.username
+        }, format='json')
+        assert response.status_code == 403, (
+            'Проверьте, что массовая модерация недоступна пользователю'
+        )
+        response = admin_client.post(self.comments_url, data={
+            'action': 'delete', 'author': user.username
+        }, format='json')
+        assert response.json() == {'count': 1}
+        response = client.get(
+            f'{title_url}reviews/{reviews[0]["id"]}/comments/'
+        )
+        assert response.json()['count'] == len(comments) - 1
+
+        from reviews.models import Review
+        from api.v1.moderation import moderate_reviews
+        with CaptureQueriesContext(connection) as queries:
+            count = moderate_reviews(
+                Review.objects.filter(title_id=titles[0]['id']),
+                'delete',
+                batch_size=2
+            )
+        assert count == 3
+        rating_updates = [
+            query for query in queries
+            if query['sql'].startswith('UPDATE "reviews_title"')
+        ]
+        assert len(rating_updates) == 1, (
+            'Проверьте, что рейтинг произведения пересчитывается один раз '
+            'после всех пачек, а не на каждую пачку или отзыв'
+        )
+        assert self.rating(client, titles[0]['id']) is None
+        assert client.get(f'{title_url}reviews/').json()['count'] == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_validation(self, admin_client, admin):
+        create_comments(admin_client, admin)
+        for data in (
+            {'action': 'delete'},
+            {'action': 'drop', 'ids': [1]},
+            {'action': 'hide', 'ids': []},
+            {'action': 'hide', 'since': 'вчера'},
+        ):
+            response = admin_client.post(
+                self.comments_url, data=data, format='json'
+            )
+            assert response.status_code == 400, (
+                'Проверьте, что без фильтров или с неверными данными '
+                'модерация возвращает 400'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_versions_bumped_after_commit(self, admin_client, admin):
+        from django.db import transaction
+
+        from api.v1.cache import get_version
+        from api.v1.moderation import apply_action
+        from reviews.models import Review
+        create_comments(admin_client, admin)
+        version = get_version(Review)
+        review = Review.objects.first()
+        with transaction.atomic():
+            review.text = 'Изменённый текст'
+            review.save()
+            apply_action(Review, [review.pk], 'hide')
+            assert get_version(Review) == version, (
+                'Проверьте, что ETag не меняется до фиксации записи: '
+                'иначе клиент получит старое тело с новым ETag'
+            )
+        assert get_version(Review) != version
+
+    def test_05_nested_deferred_rating(self):
+        from reviews.signals import deferred_rating, rating_deferred
+        with deferred_rating():
+            with deferred_rating():
+                pass
+            assert rating_deferred(), (
+                'Проверьте, что вложенный deferred_rating() '
+                'возвращает прежнее состояние'
+            )
+        assert not rating_deferred()
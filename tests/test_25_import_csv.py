@@ -0,0 +1,330 @@
+import csv
+import os
+import time
+from io import StringIO
+
+import pytest
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'static', 'data')
+
+
+def csv_rows(name):
+    with open(os.path.join(DATA_DIR, name), newline='') as csvfile:
+        return sum(1 for _ in csv.DictReader(csvfile))
+
+
+def rewrite_csv(path, change):
+    with open(path, newline='') as csvfile:
+        rows = list(csv.DictReader(csvfile))
+    change(rows)
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=rows[0].keys())
+        writer.writeheader()
+        writer.writerows(rows)
+    return rows
+
+
+def copy_data(tmp_path):
+    for name in os.listdir(DATA_DIR):
+        if name.endswith('.csv'):
+            (tmp_path / name).write_bytes(
+                open(os.path.join(DATA_DIR, name), 'rb').read()
+            )
+
+
+def dying_parser(path_to_file, label, batch_size, offset, queue):
+    from reviews.management.commands.import_csv import parse_batches
+    if label != 'reviews.Review':
+        model = apps.get_model(label)
+        for item in parse_batches(path_to_file, model, batch_size, offset):
+            queue.put(item)
+        queue.put(None)
+        return
+    # Когда все задачи уже поставлены, обработчик отзывов погибает,
+    # не отправив ни пачки, ни ошибки
+    time.sleep(1)
+    os._exit(1)
+
+
+class Test25ImportCsv:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_import_in_batches(self):
+        from api.v1.cache import get_version
+        from reviews.models import Comment, Review, Title
+        version = get_version(Review)
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('import_csv', batch_size=10, stdout=out)
+        output = out.getvalue()
+        assert get_version(Review) != version, (
+            'Проверьте, что после импорта сбрасываются версии кеша API'
+        )
+        assert 'Данные добавлены!' in output
+        assert 'review.csv: ' in output and 'строк/с' in output, (
+            'Проверьте, что import_csv сообщает скорость загрузки по файлам'
+        )
+        reviews = csv_rows('review.csv')
+        assert Review.objects.count() == reviews
+        assert Comment.objects.count() == csv_rows('comments.csv')
+        inserts = [
+            query for query in queries
+            if query['sql'].startswith('INSERT INTO "reviews_review"')
+        ]
+        assert len(inserts) == -(-reviews // 10), (
+            'Проверьте, что строки вставляются пачками по `batch_size`'
+        )
+        title = Title.objects.filter(review_count__gt=0).first()
+        assert title.rating == title.score_sum // title.review_count, (
+            'Проверьте, что после импорта рейтинг пересчитан'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_upsert(self, tmp_path):
+        from reviews.models import Comment, Genre, Review, Title
+        call_command('import_csv', stdout=StringIO())
+        copy_data(tmp_path)
+        rows = rewrite_csv(
+            tmp_path / 'titles.csv',
+            lambda rows: rows[0].update(name='Новое название')
+        )
+        rewrite_csv(
+            tmp_path / 'genre.csv',
+            lambda rows: rows.append(
+                {'id': 999, 'name': 'Новый жанр', 'slug': 'new-genre'}
+            )
+        )
+        review = Review.objects.first()
+        live = Comment.objects.create(
+            review=review, author=review.author, text='Живой комментарий'
+        )
+        rating = Title.objects.get(pk=review.title_id).rating
+
+        out = StringIO()
+        call_command(
+            'import_csv', mode='upsert', data_dir=str(tmp_path), stdout=out
+        )
+        output = out.getvalue()
+        assert 'titles.csv: ' in output and 'изменено: 1' in output, (
+            'Проверьте, что upsert обновляет только изменённые строки'
+        )
+        assert 'genre.csv: ' in output and 'новых: 1' in output
+        lines = {line.split(':')[0]: line for line in output.splitlines()}
+        for fixture in ('review.csv', 'comments.csv'):
+            assert 'изменено: 0' in lines[fixture], (
+                'Проверьте, что даты auto_now_add берутся из файла '
+                'и upsert не находит в них отличий'
+            )
+        with open(tmp_path / 'review.csv', newline='') as csvfile:
+            first = next(csv.DictReader(csvfile))
+        assert Review.objects.get(
+            pk=first['id']
+        ).pub_date.isoformat().startswith(first['pub_date'][:19])
+        assert Title.objects.get(pk=rows[0]['id']).name == 'Новое название'
+        assert Genre.objects.filter(slug='new-genre').exists()
+        assert Comment.objects.filter(pk=live.pk).exists(), (
+            'Проверьте, что upsert без --delete-missing не удаляет данные'
+        )
+        assert Title.objects.get(pk=review.title_id).rating == rating
+
+        Genre.objects.create(name='Лишний жанр', slug='extra-genre')
+        out = StringIO()
+        call_command(
+            'import_csv', mode='upsert', delete_missing=True,
+            data_dir=str(tmp_path), stdout=out
+        )
+        lines = {
+            line.split(':')[0]: line for line in out.getvalue().splitlines()
+        }
+        assert 'изменено: 0, удалено: 1' in lines['genre.csv']
+        assert not Genre.objects.filter(slug='extra-genre').exists(), (
+            'Проверьте, что --delete-missing удаляет строки каталога, '
+            'которых нет в файлах'
+        )
+        assert 'удалено: 0' in lines['comments.csv']
+        assert Comment.objects.filter(pk=live.pk).exists(), (
+            'Проверьте, что --delete-missing не удаляет комментарии, '
+            'отзывы и пользователей, созданных через API'
+        )
+
+    def test_03_write_order(self):
+        from reviews.management.commands.import_csv import write_order
+        from reviews.models import Category, Comment, Genre, Review, Title
+        from users.models import User
+        order = write_order([Comment, Review, Title, Genre, User, Category])
+        for model, dependency in (
+            (Title, Category), (Review, Title), (Review, User),
+            (Comment, Review),
+        ):
+            assert order.index(dependency) < order.index(model), (
+                'Проверьте, что таблица пишется после тех, '
+                'на которые она ссылается'
+            )
+        assert order[:2] == [Genre, User], (
+            'Проверьте, что независимые таблицы сохраняют исходный порядок'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_parallel_parsing(self, tmp_path):
+        from reviews.models import Comment, GenreTitle, Review, Title
+        counts = []
+        for workers in (1, 3):
+            out = StringIO()
+            call_command(
+                'import_csv', workers=workers, batch_size=7, stdout=out
+            )
+            assert 'Данные добавлены!' in out.getvalue()
+            counts.append([
+                model.objects.count()
+                for model in (Comment, GenreTitle, Review, Title)
+            ])
+        assert counts[0] == counts[1], (
+            'Проверьте, что разбор в процессах загружает те же данные'
+        )
+
+        copy_data(tmp_path)
+        rewrite_csv(
+            tmp_path / 'titles.csv',
+            lambda rows: rows[-1].update(year='неизвестен')
+        )
+        with pytest.raises(ValidationError):
+            call_command(
+                'import_csv', mode='upsert', workers=3,
+                data_dir=str(tmp_path), stdout=StringIO()
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_resume(self, tmp_path, monkeypatch):
+        from django.core.management.base import CommandError
+        from reviews.models import Comment, ImportCheckpoint, Review
+        copy_data(tmp_path)
+        advance = ImportCheckpoint.advance
+
+        def failing_advance(checkpoint, offset, rows):
+            if checkpoint.fixture == 'review.csv' and checkpoint.rows >= 30:
+                raise RuntimeError('Сбой при загрузке')
+            advance(checkpoint, offset, rows)
+
+        def failed_import():
+            monkeypatch.setattr(ImportCheckpoint, 'advance', failing_advance)
+            with pytest.raises(RuntimeError):
+                call_command(
+                    'import_csv', batch_size=10, workers=1,
+                    data_dir=str(tmp_path), stdout=StringIO()
+                )
+            monkeypatch.setattr(ImportCheckpoint, 'advance', advance)
+
+        failed_import()
+        assert Review.objects.count() == 30, (
+            'Проверьте, что загруженные пачки фиксируются по отдельности'
+        )
+        checkpoint = ImportCheckpoint.objects.get(fixture='review.csv')
+        assert (checkpoint.rows, checkpoint.finished) == (30, False)
+
+        out = StringIO()
+        call_command(
+            'import_csv', resume=True, batch_size=10, workers=3,
+            data_dir=str(tmp_path), stdout=out
+        )
+        output = out.getvalue()
+        assert 'users.csv: уже загружен' in output
+        assert 'review.csv: продолжаем после 30 строк' in output, (
+            'Проверьте, что --resume продолжает с контрольной точки'
+        )
+        assert Review.objects.count() == csv_rows('review.csv')
+        assert Comment.objects.count() == csv_rows('comments.csv')
+        with open(tmp_path / 'review.csv', newline='') as csvfile:
+            last = list(csv.DictReader(csvfile))[-1]
+        assert Review.objects.get(pk=last['id']).text == last['text']
+
+        failed_import()
+        rewrite_csv(
+            tmp_path / 'review.csv',
+            lambda rows: rows[-1].update(text='Изменённый текст')
+        )
+        with pytest.raises(CommandError):
+            call_command(
+                'import_csv', resume=True, data_dir=str(tmp_path),
+                stdout=StringIO()
+            )
+
+    def sqlite_state(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+            indexes = {name for name, in cursor.fetchall()}
+            pragmas = []
+            for name in ('journal_mode', 'synchronous', 'cache_size'):
+                cursor.execute(f'PRAGMA {name}')
+                pragmas.append(cursor.fetchone()[0])
+        return indexes, pragmas
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_fast(self, monkeypatch):
+        from reviews.models import ImportCheckpoint, Review
+        call_command('import_csv', stdout=StringIO())
+        indexes, pragmas = self.sqlite_state()
+        assert 'review_title_pub_date_idx' in indexes
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command('import_csv', fast=True, stdout=StringIO())
+        sql = [query['sql'] for query in queries]
+        assert any(
+            'DROP INDEX "review_title_pub_date_idx"' in query for query in sql
+        ), 'Проверьте, что --fast удаляет вторичные индексы на время загрузки'
+        assert not any(
+            'DROP INDEX "sqlite_autoindex' in query for query in sql
+        ), 'Проверьте, что --fast не трогает уникальные индексы'
+        assert 'PRAGMA synchronous = OFF' in sql
+        assert 'ANALYZE' in sql, (
+            'Проверьте, что после загрузки с --fast выполняется ANALYZE'
+        )
+        assert Review.objects.count() == csv_rows('review.csv')
+        assert self.sqlite_state() == (indexes, pragmas), (
+            'Проверьте, что после --fast индексы созданы заново, '
+            'а прагмы возвращены'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM sqlite_stat1')
+            assert cursor.fetchone()[0] > 0
+
+        def failing_advance(checkpoint, offset, rows):
+            raise RuntimeError('Сбой при загрузке')
+
+        monkeypatch.setattr(ImportCheckpoint, 'advance', failing_advance)
+        with pytest.raises(RuntimeError):
+            call_command('import_csv', fast=True, stdout=StringIO())
+        assert self.sqlite_state() == (indexes, pragmas), (
+            'Проверьте, что при ошибке загрузки с --fast индексы '
+            'и прагмы восстанавливаются'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_dead_parser(self, monkeypatch):
+        from concurrent.futures.process import BrokenProcessPool
+
+        from reviews.management.commands import import_csv
+        monkeypatch.setattr(import_csv, 'parse_to_queue', dying_parser)
+        with pytest.raises(BrokenProcessPool):
+            call_command('import_csv', workers=3, stdout=StringIO())
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('batch_size', (0, -1))
+    def test_08_invalid_batch_size(self, batch_size):
+        from django.core.management.base import CommandError
+        from reviews.models import Review
+        call_command('import_csv', stdout=StringIO())
+        with pytest.raises(CommandError):
+            call_command(
+                'import_csv', batch_size=batch_size, stdout=StringIO()
+            )
+        assert Review.objects.count() == csv_rows('review.csv'), (
+            'Проверьте, что неверный --batch-size отклоняется до очистки БД'
+        )